@@ -1,20 +1,34 @@
+import dumbconf._cache
 import dumbconf._error
 import dumbconf._roundtrip
 import dumbconf._tokenize
 import dumbconf.ast
 
+Cache = dumbconf._cache.Cache
+Encoder = dumbconf._roundtrip.Encoder
 ParseError = dumbconf._error.ParseError
+Writer = dumbconf._roundtrip.Writer
 
 ast = dumbconf.ast
 
+iter_tokens = dumbconf._tokenize.iter_tokens
+retokenize = dumbconf._tokenize.retokenize
 tokenize = dumbconf._tokenize.tokenize
+tokenize_packed = dumbconf._tokenize.tokenize_packed
 
 debug = dumbconf._parse.debug
+iter_events = dumbconf._parse.iter_events
 parse = dumbconf._parse.parse
+Spans = dumbconf._parse.Spans
 unparse = dumbconf._parse.unparse
+unparse_to = dumbconf._parse.unparse_to
 
 dumps = dumbconf._roundtrip.dumps
+iter_dumps = dumbconf._roundtrip.iter_dumps
 loads = dumbconf._roundtrip.loads
+loads_bytes = dumbconf._roundtrip.loads_bytes
+load_path = dumbconf._roundtrip.load_path
+load_many = dumbconf._roundtrip.load_many
 
 loads_roundtrip = dumbconf._roundtrip.loads_roundtrip
 dumps_roundtrip = dumbconf._roundtrip.dumps_roundtrip
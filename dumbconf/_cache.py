@@ -0,0 +1,121 @@
+"""A size limited, least recently used, cache of loaded documents"""
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import collections
+import hashlib
+import pickle
+import sys
+
+from dumbconf._lazy import freeze
+from dumbconf._roundtrip import AstProxy
+from dumbconf._roundtrip import loads
+from dumbconf._roundtrip import loads_roundtrip
+
+
+def estimate_size(obj):
+    """Roughly the memory used by `obj` and (once each) what it holds"""
+    seen = set()
+    todo = [obj]
+    ret = 0
+    while todo:
+        obj = todo.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        ret += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            todo.extend(obj.keys())
+            todo.extend(obj.values())
+        elif isinstance(obj, tuple):
+            # Not the `ast`'s `__iter__`, which decodes primitives
+            todo.extend(tuple.__iter__(obj))
+        elif isinstance(obj, list):
+            todo.extend(obj)
+    return ret
+
+
+_VALUE, _ROUNDTRIP = range(2)
+# `Cache._get` of a key which isn't cached (`None` is a document)
+_MISSING = object()
+
+
+class Cache(object):
+    """A cache in front of `loads` / `loads_roundtrip`.
+
+    Least recently used documents are evicted past `max_size` bytes.  If
+    `frozen`, `loads` returns the cached value with read-only lists / maps.
+    """
+
+    def __init__(self, max_size=64 * 1024 * 1024, frozen=False):
+        self.max_size = max_size
+        self.frozen = frozen
+        self.size = 0
+        self.hits = self.misses = self.evictions = 0
+        # key: (cached, size), in order of use
+        self._entries = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+    def _get(self, key):
+        try:
+            entry = self._entries.pop(key)
+        except KeyError:
+            self.misses += 1
+            return _MISSING
+        self.hits += 1
+        self._entries[key] = entry
+        return entry[0]
+
+    def _put(self, key, cached, size):
+        replaced = self._entries.pop(key, None)
+        if replaced is not None:
+            self.size -= replaced[1]
+        # A document which could never fit would only evict everything else
+        if size > self.max_size:
+            return
+        self._entries[key] = (cached, size)
+        self.size += size
+        while self.size > self.max_size:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.size -= evicted_size
+            self.evictions += 1
+
+    @staticmethod
+    def _key(s, kind):
+        return kind, hashlib.sha256(s.encode('UTF-8')).digest()
+
+    def loads(self, s):
+        """`loads(s)`, from the cache if `s` was loaded before"""
+        key = self._key(s, _VALUE)
+        cached = self._get(key)
+        if cached is not _MISSING:
+            return cached if self.frozen else pickle.loads(cached)
+
+        val = loads(s)
+        if self.frozen:
+            size = estimate_size(val)
+            val = freeze(val)
+            self._put(key, val, size)
+            return val
+        try:
+            # The pickle is both the copy the cache keeps and its size
+            cached = pickle.dumps(val, pickle.HIGHEST_PROTOCOL)
+        except RuntimeError:  # Too deeply nested to pickle
+            return val
+        self._put(key, cached, len(cached))
+        return val
+
+    def loads_roundtrip(self, s):
+        """`loads_roundtrip(s)`, from the cache if `s` was loaded before"""
+        key = self._key(s, _ROUNDTRIP)
+        doc = self._get(key)
+        if doc is _MISSING:
+            doc = loads_roundtrip(s)._ast_obj
+            self._put(key, doc, estimate_size(doc))
+        return AstProxy(doc)
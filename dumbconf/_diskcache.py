@@ -0,0 +1,99 @@
+"""Loaded files cached on disk, see `load_path(..., cache_dir=...)`"""
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import collections
+import hashlib
+import io
+import os
+import pickle
+import sys
+import tempfile
+
+
+# Changed whenever what is cached changes
+_FORMAT = 1
+_version = None
+
+
+def _dist_version():
+    try:
+        from importlib.metadata import PackageNotFoundError
+        from importlib.metadata import version
+    except ImportError:  # pragma: no cover (<PY38)
+        import pkg_resources
+        PackageNotFoundError = pkg_resources.DistributionNotFound
+
+        def version(name):
+            return pkg_resources.get_distribution(name).version
+    try:
+        return version('dumbconf')
+    except PackageNotFoundError:  # pragma: no cover (not installed)
+        return None
+
+
+def cache_version():
+    """What the cached values depend on besides the files"""
+    global _version
+    if _version is None:
+        _version = (_FORMAT, _dist_version(), sys.version_info[:2])
+    return _version
+
+
+def entry_path(cache_dir, path):
+    name = hashlib.sha256(os.path.abspath(path).encode('UTF-8')).hexdigest()
+    return os.path.join(cache_dir, name)
+
+
+def entry_key(stat, src):
+    """The header an entry for a file with `os.stat` `stat` must match"""
+    digest = hashlib.sha256(src).hexdigest()
+    return cache_version(), stat.st_mtime, stat.st_size, digest
+
+
+MISSING = object()
+# Atomically replaces an existing file
+_replace = getattr(os, 'replace', os.rename)
+
+
+class _Unpickler(pickle.Unpickler):
+    """Unpickles only the values `loads` returns, so entries can't run code"""
+
+    def find_class(self, module, name):
+        if (module, name) == ('collections', 'OrderedDict'):
+            return collections.OrderedDict
+        raise pickle.UnpicklingError(
+            'Unexpected {}.{} in cache entry'.format(module, name),
+        )
+
+
+def read(path, key):
+    """The cached value at `path` if its key is `key`, else `MISSING`"""
+    try:
+        with io.open(path, 'rb') as f:
+            unpickler = _Unpickler(f)
+            # The key is before the value, which is only loaded if valid
+            if unpickler.load() != key:
+                return MISSING
+            return unpickler.load()
+    except Exception:  # A missing, partly written or corrupt entry
+        return MISSING
+
+
+def write(path, key, value):
+    """Cache `value` at `path`, a failure to write only loses the entry"""
+    cache_dir = os.path.dirname(path)
+    try:
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        fd, tmp = tempfile.mkstemp(dir=cache_dir)
+    except OSError:
+        return
+    try:
+        with io.open(fd, 'wb') as f:
+            pickle.dump(key, f, pickle.HIGHEST_PROTOCOL)
+            pickle.dump(value, f, pickle.HIGHEST_PROTOCOL)
+        # Replaced whole so readers never see a partial entry
+        _replace(tmp, path)
+    except (OSError, IOError, RuntimeError):  # RuntimeError: too deep
+        os.remove(tmp)
@@ -1,47 +1,120 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 
+import array
+import bisect
+import re
+
+
+_NL_RE = re.compile('\n')
+_NL_BYTES_RE = re.compile(b'\n')
+# Lines of source shown either side of the error
+_CONTEXT = 2
+# Longest excerpt of a line kept (in characters, or bytes for bytes)
+_MAX_LINE = 160
+
+
+def index_lines(src):
+    """The offset of the start of each line in `src` (text, bytes or mmap)"""
+    nl_re = _NL_RE if isinstance(src, type('')) else _NL_BYTES_RE
+    ret = array.array('I', [0])
+    ret.extend(match.end() for match in nl_re.finditer(src))
+    return ret
+
+
+def _decode(s):
+    if isinstance(s, type('')):
+        return s
+    else:
+        return s.decode('UTF-8', 'replace')
+
 
 class ParseError(ValueError):
-    def __init__(self, src, offset, msg=None):
-        self.src = src
-        self.offset = offset
+    """An error at `offset` in `src` (text or UTF-8 encoded bytes).
+
+    `src` may be a window of a larger document, starting at `src_offset`,
+    `src_line` and `src_col`.  Only the position and an excerpt are kept.
+    """
+
+    def __init__(
+            self, src, offset, msg=None, src_line=1, src_col=1,
+            line_starts=None, src_offset=0,
+    ):
+        super(ParseError, self).__init__(msg)
+        self.offset = src_offset + offset
         self.msg = msg
+        self.line = self.col = None
+        # `(line number, source)` of the lines around the error and where in
+        # them the error is
+        self.excerpt = ()
+        self.caret_line = self.caret = 0
+        if len(src):
+            self._locate(src, offset, src_line, src_col, line_starts)
 
-    def __str__(self):
-        if not self.src:
-            return self.msg
-        src_to = self.src[:self.offset + 1]
-        if '\n' not in src_to:
-            line = 1
-            col = self.offset + 1
-        elif src_to.endswith('\n'):
-            line = src_to.count('\n')
-            col = len(src_to) - src_to[:-1].rfind('\n') - 1
-        else:
-            line = src_to.count('\n') + 1
-            col = len(src_to) - src_to.rfind('\n') - 1
-
-        line_index = line - 1
-        lines = self.src.splitlines()
-        formatted_lines = ''
+    def _locate(self, src, offset, src_line, src_col, line_starts):
+        if line_starts is None:
+            line_starts = index_lines(src)
+        srclen = len(src)
+        # A trailing newline does not start a line of its own, an error at
+        # the end of the file points at the newline
+        nlines = len(line_starts)
+        if line_starts[-1] == srclen:
+            nlines -= 1
+            offset = min(offset, srclen - 1)
+
+        def line_bounds(index):
+            start = line_starts[index]
+            if index + 1 < len(line_starts):
+                return start, line_starts[index + 1] - 1
+            else:
+                return start, srclen
 
-        def format_line(index):
-            return '{: <4}|{}\n'.format(index + 1, lines[index])
+        line_index = bisect.bisect_right(line_starts, offset, hi=nlines) - 1
+        start, _ = line_bounds(line_index)
+        col = len(_decode(src[start:offset])) + 1
+        self.line = line_index + src_line
+        self.col = col + src_col - 1 if line_index == 0 else col
 
-        for index in range(max(0, line_index - 2), line_index):
-            formatted_lines += format_line(index)
+        # Very long lines are cut down to the part around the error
+        clip = max(offset - start - _MAX_LINE // 2, 0)
+        excerpt = []
+        first = max(0, line_index - _CONTEXT)
+        for index in range(first, min(nlines, line_index + _CONTEXT + 1)):
+            line_start, line_end = line_bounds(index)
+            line_start = min(line_start + clip, line_end)
+            line_end = min(line_end, line_start + _MAX_LINE)
+            line_src = _decode(src[line_start:line_end])
+            excerpt.append((index + src_line, line_src))
+        self.excerpt = tuple(excerpt)
+        self.caret = len(_decode(src[start + clip:offset])) + 1
+        self.caret_line = line_index - first
 
-        formatted_lines += format_line(line_index)
-        formatted_lines += ' ' * (4 + col) + '^\n'
+    def __reduce__(self):
+        # Rebuilt from what was kept, there is no `src` to construct it from
+        return _from_state, (type(self), self.args, self.__dict__)
 
-        for index in range(line_index + 1, min(len(lines), line_index + 3)):
-            formatted_lines += format_line(index)
+    def __str__(self):
+        if not self.excerpt:
+            return self.msg
+
+        formatted_lines = ''
+        for i, (line, line_src) in enumerate(self.excerpt):
+            formatted_lines += '{: <4}|{}\n'.format(line, line_src)
+            if i == self.caret_line:
+                formatted_lines += ' ' * (4 + self.caret) + '^\n'
 
         return (
             '{}\n\n'
             'Line {}, column {}\n\n'
             'Line|Source\n'
             '----|------------------------------------------------------\n'
-            '{}'.format(self.msg or '', line, col, formatted_lines)
+            '{}'.format(self.msg or '', self.line, self.col, formatted_lines)
         )
+
+
+def _from_state(cls, args, state):
+    ret = cls.__new__(cls, *args)
+    # python 2 only sets `args` in `__init__`
+    ret.args = args
+    ret.__dict__.update(state)
+    return ret
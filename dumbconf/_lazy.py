@@ -0,0 +1,113 @@
+"""Read-only lists / maps, parsed when first looked into or `freeze`d"""
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+try:
+    from collections.abc import Mapping
+    from collections.abc import Sequence
+except ImportError:  # pragma: no cover (PY2)
+    from collections import Mapping
+    from collections import Sequence
+
+
+class _Lazy(object):
+    __slots__ = ('_parse', '_value')
+
+    def __init__(self, parse):
+        self._parse = parse
+        self._value = None
+
+    @property
+    def is_parsed(self):
+        return self._parse is None
+
+    def _get(self):
+        if self._parse is not None:
+            self._value = self._parse()
+            self._parse = None
+        return self._value
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, self._get())
+
+
+class LazyMap(_Lazy, Mapping):
+    """A read-only mapping, its `OrderedDict` is parsed on first access"""
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        return self._get()[key]
+
+    def __iter__(self):
+        return iter(self._get())
+
+    def __len__(self):
+        return len(self._get())
+
+
+class LazyList(_Lazy, Sequence):
+    """A read-only sequence, its `list` is parsed on first access"""
+    __slots__ = ()
+
+    def __getitem__(self, index):
+        return self._get()[index]
+
+    def __iter__(self):
+        return iter(self._get())
+
+    def __len__(self):
+        return len(self._get())
+
+    def __eq__(self, other):
+        if isinstance(other, LazyList):
+            other = other._get()
+        return self._get() == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+
+class FrozenMap(LazyMap):
+    """A read-only view of an `OrderedDict`"""
+    __slots__ = ()
+
+    def __init__(self, value):
+        super(FrozenMap, self).__init__(None)
+        self._value = value
+
+
+class FrozenList(LazyList):
+    """A read-only view of a `list`"""
+    __slots__ = ()
+
+    def __init__(self, value):
+        super(FrozenList, self).__init__(None)
+        self._value = value
+
+
+def freeze(val):
+    """Replace `val`'s lists / maps (nested too) with read-only ones"""
+    todo = []
+
+    def frozen(v):
+        if isinstance(v, dict):
+            todo.append(v)
+            return FrozenMap(v)
+        elif isinstance(v, list):
+            todo.append(v)
+            return FrozenList(v)
+        else:
+            return v
+
+    ret = frozen(val)
+    while todo:
+        container = todo.pop()
+        if isinstance(container, dict):
+            keys = list(container)
+        else:
+            keys = range(len(container))
+        for key in keys:
+            container[key] = frozen(container[key])
+    return ret
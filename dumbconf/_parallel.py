@@ -0,0 +1,119 @@
+"""Parsing the items of a large top level map in parallel"""
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import collections
+import multiprocessing
+import re
+
+from dumbconf import ast
+from dumbconf._error import ParseError
+from dumbconf._parse import parse_top_level_items
+from dumbconf._parse import top_level_items_from_layout
+from dumbconf._parse import top_level_items_layout
+from dumbconf._tokenize import tokenize_packed
+from dumbconf._tokenize import TokenStream
+
+
+# A line which could start a top level item (the line of its key)
+_ITEM_START_RE = re.compile('^[^\\s#\\[\\]{}]', re.MULTILINE)
+# A line which could be part of an item's head
+_TRIVIA_LINE_RE = re.compile(' *(?:#.*)?\n')
+# Pieces are at least this many characters
+_MIN_PIECE = 64 * 1024
+# Each worker gets a few pieces of the work, to balance it around uneven
+# pieces
+_PIECES_PER_WORKER = 4
+
+
+def map_in_pool(func, args, workers):
+    """`map` in a pool of `workers` processes, handing out `args` in chunks"""
+    chunksize = max(1, len(args) // (workers * _PIECES_PER_WORKER))
+    pool = multiprocessing.Pool(workers)
+    try:
+        return pool.map(func, args, chunksize)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def split_top_level(src, pieces):
+    """Offsets splitting `src` into about `pieces` runs of top level items.
+
+    Only the starts of lines are looked at, so a piece may not parse alone.
+    """
+    bounds = [0]
+    for i in range(1, pieces):
+        pos = max(len(src) * i // pieces, bounds[-1] + 1)
+        match = _ITEM_START_RE.search(src, pos)
+        if match is None:
+            break
+        split = match.start()
+        while split > bounds[-1]:
+            line_start = src.rfind('\n', 0, split - 1) + 1
+            line = _TRIVIA_LINE_RE.match(src, line_start, split)
+            if line is None or line.end() != split:
+                break
+            split = line_start
+        if split > bounds[-1]:
+            bounds.append(split)
+    bounds.append(len(src))
+    return bounds
+
+
+def _piece_tokens(src, start, kinds=None, starts=None, ends=None):
+    if start:
+        offset = 0
+    else:
+        # The tokenizer looks behind for the newline the piece follows
+        src, offset = '\n' + src, 1
+    if kinds is None:
+        return tokenize_packed(src, offset)
+    else:
+        return TokenStream(src, kinds, starts, ends)
+
+
+def parse_piece(args):
+    """Parse a piece of `split_top_level` in a worker, `None` if invalid"""
+    src, start, value = args
+    try:
+        tokens = _piece_tokens(src, start)
+        head, items = parse_top_level_items(tokens, start=start, value=value)
+    except ParseError:
+        return None
+    if value:
+        return items
+    else:
+        layout = top_level_items_layout(head, items)
+        return tokens.kinds, tokens.starts, tokens.ends, layout
+
+
+def parse_parallel(src, workers, value=False):
+    """Parse a document whose top level is a map using `workers` processes.
+
+    Returns `None` if it can't be split into valid pieces (parse it whole).
+    """
+    pieces = min(workers * _PIECES_PER_WORKER, len(src) // _MIN_PIECE)
+    bounds = split_top_level(src, pieces)
+    if len(bounds) < 3:
+        return None
+    args = [
+        (src[start:end], start == 0, value)
+        for start, end in zip(bounds, bounds[1:])
+    ]
+    results = map_in_pool(parse_piece, args, workers)
+    if None in results:
+        return None
+
+    if value:
+        ret = collections.OrderedDict()
+        for items in results:
+            ret.update(items)
+        return ret
+    head, items = (), []
+    for (piece, start, _), (kinds, starts, ends, layout) in zip(args, results):
+        tokens = _piece_tokens(piece, start, kinds, starts, ends)
+        piece_head, piece_items = top_level_items_from_layout(tokens, layout)
+        head += piece_head
+        items.extend(piece_items)
+    return ast.Doc(head, ast.Map((), tuple(items), ()), ())
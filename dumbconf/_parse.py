@@ -1,214 +1,703 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 
-import contextlib
+import array
+import collections
 import functools
 
 from dumbconf import ast
-from dumbconf._tokenize import tokenize
-from dumbconf._tre import get_pattern
-from dumbconf._tre import matches_pattern
+from dumbconf._error import ParseError
+from dumbconf._lazy import LazyList
+from dumbconf._lazy import LazyMap
+from dumbconf._tokenize import DECODE
+from dumbconf._tokenize import iter_lexemes
+from dumbconf._tokenize import KIND
+from dumbconf._tokenize import pack_tokens
+from dumbconf._tokenize import tokenize_packed
+from dumbconf._tokenize import TokenStream
+from dumbconf._tre import compile_pattern
 from dumbconf._tre import Or
 from dumbconf._tre import Pattern
-from dumbconf._tre import pattern_expected
 from dumbconf._tre import Star
 
 
-PT_REST_OF_LINE = Or(ast.NL, Pattern(Star(ast.Space), ast.Comment))
-PT_COMMA_REST_OF_LINE = Pattern(ast.Comma, PT_REST_OF_LINE)
-PT_HEAD = Star(Or(ast.Indent, ast.NL, ast.Comment))
-PT_COLON_SPACE = Pattern(ast.Colon, ast.Space)
-PT_COMMA_SPACE = Pattern(ast.Comma, ast.Space)
-PT_VALUE_TOKENS = Or(ast.Bool, ast.Null, ast.Float, ast.Int, ast.String)
-PT_KEY = Or(PT_VALUE_TOKENS, ast.BareWordKey)
-
-
-def _parse_start(tokens, offset, ast_start):
-    ret, offset = get_pattern(tokens, offset, ast_start)
-    match = matches_pattern(tokens, offset, PT_REST_OF_LINE)
-    if match:
-        rest, offset = match.match()
-        ret += rest
-    return ret, offset, bool(match)
-
-
-def _parse_items(tokens, offset, endtoken, parse_item):
-    items = []
-    while not matches_pattern(tokens, offset, endtoken):
-        val, offset = parse_item(tokens, offset, head=())
-        if not matches_pattern(tokens, offset, endtoken):
-            comma_space, offset = get_pattern(tokens, offset, PT_COMMA_SPACE)
-            val = val._replace(tail=val.tail + comma_space)
-        items.append(val)
-    return tuple(items), (), (), offset
-
-
-def _parse_items_multiline(tokens, offset, endtoken, parse_item):
-    more_head = ()
-    more_tail = ()
-    items = []
-    while True:
-        head, offset = get_pattern(tokens, offset, PT_HEAD)
+PT_REST_OF_LINE = compile_pattern(
+    Or(ast.NL, Pattern(Star(ast.Space), ast.Comment)),
+)
+PT_COMMA_REST_OF_LINE = compile_pattern(Pattern(ast.Comma, PT_REST_OF_LINE))
+PT_HEAD = compile_pattern(Star(Or(ast.Indent, ast.NL, ast.Comment)))
+PT_COLON_SPACE = compile_pattern(Pattern(ast.Colon, ast.Space))
+PT_COMMA_SPACE = compile_pattern(Pattern(ast.Comma, ast.Space))
+PT_VALUE_TOKENS = compile_pattern(
+    Or(ast.Bool, ast.Null, ast.Float, ast.Int, ast.String),
+)
+PT_KEY = compile_pattern(Or(PT_VALUE_TOKENS, ast.BareWordKey))
+PT_VALUE = compile_pattern(Or(PT_VALUE_TOKENS, ast.ListStart, ast.MapStart))
+PT_TOP_LEVEL_MAP = compile_pattern(Pattern(PT_KEY, PT_COLON_SPACE))
+PT_EOF = compile_pattern(ast.EOF)
+PT_LIST_START = compile_pattern(ast.ListStart)
+PT_LIST_END = compile_pattern(ast.ListEnd)
+PT_MAP_START = compile_pattern(ast.MapStart)
+PT_MAP_END = compile_pattern(ast.MapEnd)
+PT_TAIL = compile_pattern(Star(PT_REST_OF_LINE))
+
+
+def _parse_start(tokens, offset, start):
+    ret, offset = start.get(tokens, offset)
+    end = PT_REST_OF_LINE.match(tokens.kinds, offset)
+    if end >= 0:
+        ret += tokens[offset:end]
+        offset = end
+    return ret, offset, end >= 0
+
+
+# How a container's items are laid out
+_INLINE, _MULTILINE, _TOP_LEVEL = range(3)
+
+
+_NO_ITEM = object()
+
+
+class _Frame(object):
+    """A container being parsed, built up in place until it is complete"""
+    __slots__ = (
+        'cls', 'endtoken', 'layout', 'head', 'items', 'tail',
+        'item_head', 'key', 'colon_space', 'item_val', 'item_tail',
+    )
+    # Whether lists / maps in the items are skipped, see `_LazyFrame`
+    lazy = False
+
+    def __init__(self, cls, endtoken, layout, head):
+        self.cls = cls
+        self.endtoken = endtoken
+        self.layout = layout
+        self.head = head
+        self.items = []
+        self.tail = ()
+        self.item_head = self.key = self.colon_space = None
+        self.item_val = _NO_ITEM
+        self.item_tail = ()
+
+    def build(self):
+        self._freeze_item()
+        return self.cls(self.head, tuple(self.items), self.tail)
+
+    def _add_item(self, val, tail):
+        self.item_val = val
+        self.item_tail = tail
+
+    def _freeze_item(self):
+        if self.item_val is _NO_ITEM:
+            return
+        elif self.cls is ast.Map:
+            item = ast.MapItem(
+                self.item_head, self.key, self.colon_space, self.item_val,
+                self.item_tail,
+            )
+        else:
+            item = ast.ListItem(self.item_head, self.item_val, self.item_tail)
+        self.items.append(item)
+        self.item_val = _NO_ITEM
+
+    def _begin_item(self, tokens, offset, head):
+        self._freeze_item()
+        self.item_head = head
+        if self.cls is ast.Map:
+            self.key, offset = PT_KEY.get(tokens, offset, single=True)
+            self.colon_space, offset = PT_COLON_SPACE.get(tokens, offset)
+        return offset
+
+    def _end(self, tokens, offset, head):
         # It's possible that there's comments / newlines after the last
         # item.  In that case, we augment the tail of the previous item.
         # If there are no items, this augments the head of the list itself.
-        if matches_pattern(tokens, offset, endtoken):
-            if head and isinstance(head[-1], ast.Indent):
-                head, more_tail = head[:-1], head[-1:]
-            if items:
-                items[-1] = items[-1]._replace(tail=items[-1].tail + head)
-            else:
-                more_head = head
-            break
-        val, offset = parse_item(tokens, offset, head=head)
-        # Allow multiple items to be on a single line
-        while not matches_pattern(tokens, offset, PT_COMMA_REST_OF_LINE):
-            rest, offset = get_pattern(tokens, offset, PT_COMMA_SPACE)
-            val = val._replace(tail=val.tail + rest)
-            items.append(val)
-            val, offset = parse_item(tokens, offset, head=())
-        rest, offset = get_pattern(tokens, offset, PT_COMMA_REST_OF_LINE)
-        val = val._replace(tail=val.tail + rest)
-        items.append(val)
-    return tuple(items), more_head, more_tail, offset
-
-
-def _parse_container(tokens, offset, cls, starttoken, endtoken, parse_item):
+        if self.layout == _TOP_LEVEL:
+            self.item_tail += head
+            return offset
+        if head and isinstance(head[-1], ast.Indent):
+            head, self.tail = head[:-1], head[-1:]
+        if self.item_val is not _NO_ITEM:
+            self.item_tail += head
+        else:
+            self.head += head
+        end, offset = self.endtoken.get(tokens, offset)
+        self.tail += end
+        return offset
+
+    def next_item(self, tokens, offset):
+        """Move to the value of the next item.
+
+        Returns the new offset and whether the container has ended instead.
+        """
+        if self.layout == _INLINE:
+            head = ()
+            if self.endtoken.match(tokens.kinds, offset) >= 0:
+                self.tail, offset = self.endtoken.get(tokens, offset)
+                return offset, True
+        else:
+            head, offset = PT_HEAD.get(tokens, offset)
+            if self.endtoken.match(tokens.kinds, offset) >= 0:
+                return self._end(tokens, offset, head), True
+        return self._begin_item(tokens, offset, head), False
+
+    def add_value(self, val, tokens, offset):
+        """Finish the current item with its value, then `next_item`"""
+        kinds = tokens.kinds
+        tail = ()
+        if self.layout == _INLINE:
+            if self.endtoken.match(kinds, offset) < 0:
+                tail, offset = PT_COMMA_SPACE.get(tokens, offset)
+        elif self.layout == _MULTILINE:
+            # Allow multiple items to be on a single line
+            if PT_COMMA_REST_OF_LINE.match(kinds, offset) < 0:
+                tail, offset = PT_COMMA_SPACE.get(tokens, offset)
+                self._add_item(val, tail)
+                return self._begin_item(tokens, offset, ()), False
+            tail, offset = PT_COMMA_REST_OF_LINE.get(tokens, offset)
+        else:
+            end = PT_REST_OF_LINE.match(kinds, offset)
+            if end >= 0:
+                tail = tokens[offset:end]
+                offset = end
+        self._add_item(val, tail)
+        return self.next_item(tokens, offset)
+
+
+class _ValueFrame(_Frame):
+    """A `_Frame` building the python value rather than the ast"""
+    __slots__ = ()
+
+    def __init__(self, cls, endtoken, layout, head):
+        super(_ValueFrame, self).__init__(cls, endtoken, layout, head)
+        if cls is ast.Map:
+            self.items = collections.OrderedDict()
+
+    def build(self):
+        return self.items
+
+    def _add_item(self, val, tail):
+        if self.cls is ast.Map:
+            self.items[self.key] = val
+        else:
+            self.items.append(val)
+
+
+class _LazyFrame(_Frame):
+    """A `_Frame` which leaves nested lists / maps to be parsed lazily"""
+    __slots__ = ()
+    lazy = True
+
+    def skip(self, tokens, offset):
+        return _skip_lazy(tokens, offset, type(self))
+
+
+def _skip_lazy(tokens, offset, frame_cls):
+    end = tokens.bracket_end(offset)
+    if tokens.kinds[offset] in PT_LIST_START.first:
+        cls = ast.LazyList
+    else:
+        cls = ast.LazyMap
+    node = cls.lazy(
+        functools.partial(_parse_container, tokens, offset, frame_cls),
+        functools.partial(tokens.source, offset, end),
+    )
+    return node, end + 1
+
+
+class _LazyValueFrame(_ValueFrame):
+    """A `_ValueFrame` which skips lists / maps, see `_LazyFrame`"""
+    __slots__ = ()
+    lazy = True
+
+    def skip(self, tokens, offset):
+        end = tokens.bracket_end(offset)
+        if tokens.kinds[offset] in PT_LIST_START.first:
+            cls = LazyList
+        else:
+            cls = LazyMap
+        parse = functools.partial(_parse_container, tokens, offset, type(self))
+        return cls(parse), end + 1
+
+
+class _ValueTokens(object):
+    """A view of a `TokenStream` of decoded primitives, without trivia"""
+    __slots__ = ('kinds', 'value', 'error', 'bracket_end')
+
+    def __init__(self, tokens):
+        self.kinds = tokens.kinds
+        self.value = tokens.value
+        self.error = tokens.error
+        self.bracket_end = tokens.bracket_end
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return ()
+        else:
+            return self.value(key)
+
+
+def _start_container(tokens, offset, frame_cls, cls, starttoken, endtoken):
     head, offset, multiline = _parse_start(tokens, offset, starttoken)
-    func = _parse_items_multiline if multiline else _parse_items
-    itemsret = func(tokens, offset, endtoken, parse_item)
-    items, more_head, more_tail, offset = itemsret
-    tail, offset = get_pattern(tokens, offset, endtoken)
-    return cls(head + more_head, items, more_tail + tail), offset
-
-
-def _parse_list_item(tokens, offset, head):
-    val, offset = _parse_val(tokens, offset)
-    return ast.ListItem(head, val, ()), offset
-
-
-_parse_list = functools.partial(
-    _parse_container,
-    cls=ast.List, starttoken=ast.ListStart, endtoken=ast.ListEnd,
-    parse_item=_parse_list_item,
-)
-
-
-def _parse_map_item(tokens, offset, head):
-    key, offset = get_pattern(tokens, offset, PT_KEY, single=True)
-    colon_space, offset = get_pattern(tokens, offset, PT_COLON_SPACE)
-    val, offset = _parse_val(tokens, offset)
-    return ast.MapItem(head, key, colon_space, val, ()), offset
+    layout = _MULTILINE if multiline else _INLINE
+    return frame_cls(cls, endtoken, layout, head), offset
+
+
+def _parse_step(tokens, offset, stack, frame_cls):
+    """Parse the value at `offset`, `stack` holds the containers waiting on it.
+
+    Nesting is kept on an explicit stack rather than by recursing (as in the
+    other walks of values and asts) so deep documents don't hit python's
+    recursion limit.  Returns `(value, offset, done)`, `value` once done.
+    """
+    kind = tokens.kinds[offset]
+    if kind in PT_VALUE_TOKENS.first:
+        val, offset = tokens[offset], offset + 1
+    elif stack and stack[-1].lazy and tokens.bracket_end(offset) >= 0:
+        val, offset = stack[-1].skip(tokens, offset)
+    else:
+        if kind in PT_LIST_START.first:
+            frame, offset = _start_container(
+                tokens, offset, frame_cls,
+                ast.List, PT_LIST_START, PT_LIST_END,
+            )
+        elif kind in PT_MAP_START.first:
+            frame, offset = _start_container(
+                tokens, offset, frame_cls,
+                ast.Map, PT_MAP_START, PT_MAP_END,
+            )
+        else:
+            PT_VALUE.raise_expected(tokens, offset)
+        stack.append(frame)
+        offset, done = frame.next_item(tokens, offset)
+        if not done:
+            return None, offset, False
+        val = stack.pop().build()
+
+    while stack:
+        offset, done = stack[-1].add_value(val, tokens, offset)
+        if not done:
+            return None, offset, False
+        val = stack.pop().build()
+    return val, offset, True
+
+
+def _start_top_level(tokens, offset, stack, frame_cls):
+    # Only at the top level are non-bracketed maps allowed
+    if PT_TOP_LEVEL_MAP.match(tokens.kinds, offset) >= 0:
+        frame = frame_cls(ast.Map, PT_EOF, _TOP_LEVEL, ())
+        offset, _ = frame.next_item(tokens, offset)
+        stack.append(frame)
+    return offset
 
 
-_parse_map = functools.partial(
-    _parse_container,
-    cls=ast.Map, starttoken=ast.MapStart, endtoken=ast.MapEnd,
-    parse_item=_parse_map_item,
-)
+def _parse_value(tokens, offset, stack, frame_cls):
+    done = False
+    while not done:
+        val, offset, done = _parse_step(tokens, offset, stack, frame_cls)
+    return val, offset
 
 
-def _parse_top_level_map(tokens, offset):
-    items = []
-    while True:
-        head, offset = get_pattern(tokens, offset, PT_HEAD)
-        if matches_pattern(tokens, offset, ast.EOF):
-            items[-1] = items[-1]._replace(tail=items[-1].tail + head)
-            break
-        item, offset = _parse_map_item(tokens, offset, head)
-        if matches_pattern(tokens, offset, PT_REST_OF_LINE):
-            tail, offset = get_pattern(tokens, offset, PT_REST_OF_LINE)
-            item = item._replace(tail=tail)
-        items.append(item)
-    return ast.Map(head=(), items=tuple(items), tail=()), offset
-
-
-def _parse_val(tokens, offset):
-    if matches_pattern(tokens, offset, PT_VALUE_TOKENS):
-        return get_pattern(tokens, offset, PT_VALUE_TOKENS, single=True)
-    elif matches_pattern(tokens, offset, ast.ListStart):
-        return _parse_list(tokens, offset)
-    elif matches_pattern(tokens, offset, ast.MapStart):
-        return _parse_map(tokens, offset)
-    else:
-        missing_pattern = Or(PT_VALUE_TOKENS, ast.ListStart, ast.MapStart)
-        pattern_expected(tokens, offset, missing_pattern)
+def _parse_top_level(tokens, offset, frame_cls):
+    stack = []
+    offset = _start_top_level(tokens, offset, stack, frame_cls)
+    return _parse_value(tokens, offset, stack, frame_cls)
 
 
-def _parse_top_level(tokens, offset):
-    # Only at the top level are non-bracketed maps allowed
-    if matches_pattern(tokens, offset, Pattern(PT_KEY, PT_COLON_SPACE)):
-        return _parse_top_level_map(tokens, offset)
-    else:
-        return _parse_val(tokens, offset)
+def _parse_container(tokens, offset, frame_cls):
+    """Parse a list / map skipped by a lazy frame"""
+    val, _ = _parse_value(tokens, offset, [], frame_cls)
+    return val
 
 
 def _parse_eof(tokens, offset):
     """Parse the end of the file"""
-    ret, offset = get_pattern(tokens, offset, Star(PT_REST_OF_LINE))
-    get_pattern(tokens, offset, ast.EOF)
+    ret, offset = PT_TAIL.get(tokens, offset)
+    PT_EOF.get(tokens, offset)
     return ret, offset
 
 
-def parse_from_tokens(tokens, offset=0):
-    head, offset = get_pattern(tokens, offset, PT_HEAD)
-    val, offset = _parse_top_level(tokens, offset)
+def parse_from_tokens(tokens, offset=0, lazy=False):
+    """Parse tokens to an `ast.Doc`.
+
+    If `lazy`, nested lists / maps are only parsed when first looked into.
+    """
+    if not isinstance(tokens, TokenStream):
+        tokens = pack_tokens(tokens)
+    head, offset = PT_HEAD.get(tokens, offset)
+    frame_cls = _LazyFrame if lazy else _Frame
+    val, offset = _parse_top_level(tokens, offset, frame_cls)
     tail, offset = _parse_eof(tokens, offset)
     return ast.Doc(head, val, tail)
 
 
-def parse(src):
-    return parse_from_tokens(tokenize(src))
+def parse(src, lazy=False):
+    return parse_from_tokens(tokenize_packed(src), lazy=lazy)
 
 
-def unparse(ast_obj):
-    src = ''
-    for field in ast_obj._fields:
-        attr = getattr(ast_obj, field)
-        if field == 'src':
-            src += attr
-        elif type(attr) is tuple:
-            for el in attr:
-                src += unparse(el)
-        elif isinstance(attr, ast.AST):
-            src += unparse(attr)
-    return src
-
-
-def debug(ast_obj, _indent=0):
-    if 'src' in ast_obj._fields:
-        return repr(ast_obj)
+def value_from_tokens(tokens, offset=0, lazy=False):
+    """Parse a `TokenStream` straight to its python value, building no ast.
+
+    `lazy` is as for `parse_from_tokens`.
+    """
+    tokens = _ValueTokens(tokens)
+    offset = PT_HEAD.match(tokens.kinds, offset)
+    frame_cls = _LazyValueFrame if lazy else _ValueFrame
+    val, offset = _parse_top_level(tokens, offset, frame_cls)
+    _parse_eof(tokens, offset)
+    return val
+
+
+def parse_top_level_items(tokens, start=True, value=False, lazy=False):
+    """Parse a run of a top level map's items: `(head, items)`.
+
+    Unless `start` (of the document) `head` is empty and the first item's head
+    is the trivia before it.  If `value`, `items` is an `OrderedDict`.
+    """
+    if value:
+        tokens = _ValueTokens(tokens)
+        frame_cls = _ValueFrame
     else:
-        class state:
-            indent = _indent
-
-        @contextlib.contextmanager
-        def indented():
-            state.indent += 1
-            yield
-            state.indent -= 1
-
-        def indentstr():
-            return state.indent * '    '
-
-        out = type(ast_obj).__name__ + '(\n'
-        with indented():
-            for field in ast_obj._fields:
-                attr = getattr(ast_obj, field)
-                if attr == ():
-                    representation = repr(attr)
-                elif type(attr) is tuple:
-                    representation = '(\n'
-                    with indented():
-                        for el in attr:
-                            representation += '{}{},\n'.format(
-                                indentstr(), debug(el, state.indent),
-                            )
-                    representation += indentstr() + ')'
-                elif isinstance(attr, ast.AST):
-                    representation = debug(attr, state.indent)
+        frame_cls = _LazyFrame if lazy else _Frame
+    head, offset = (), 0
+    if start:
+        head, offset = PT_HEAD.get(tokens, offset)
+    frame = frame_cls(ast.Map, PT_EOF, _TOP_LEVEL, ())
+    offset, _ = frame.next_item(tokens, offset)
+    val, offset = _parse_value(tokens, offset, [frame], frame_cls)
+    _parse_eof(tokens, offset)
+    return head, val if value else val.items
+
+
+def top_level_items_layout(head, items):
+    """The token counts of the parts of `parse_top_level_items`' ast"""
+    layout = array.array('I', (len(head),))
+    for item in items:
+        layout.extend((len(item.head), len(item.inner), len(item.tail)))
+    return layout
+
+
+def top_level_items_from_layout(tokens, layout):
+    """Rebuild `parse_top_level_items(tokens, lazy=True)` from its layout"""
+    offset = layout[0]
+    head = tokens[:offset]
+    items = []
+    for i in range(1, len(layout), 3):
+        head_len, inner_len, tail_len = layout[i:i + 3]
+        item_head = tokens[offset:offset + head_len]
+        offset += head_len
+        key = tokens[offset]
+        inner = tokens[offset + 1:offset + 1 + inner_len]
+        offset += 1 + inner_len
+        if tokens.kinds[offset] in PT_VALUE_TOKENS.first:
+            val, offset = tokens[offset], offset + 1
+        else:
+            val, offset = _skip_lazy(tokens, offset, _LazyFrame)
+        tail = tokens[offset:offset + tail_len]
+        offset += tail_len
+        items.append(ast.MapItem(item_head, key, inner, val, tail))
+    return head, tuple(items)
+
+
+Event = collections.namedtuple('Event', ('type', 'value', 'start', 'end'))
+
+START_MAP = 'start_map'
+END_MAP = 'end_map'
+START_LIST = 'start_list'
+END_LIST = 'end_list'
+KEY = 'key'
+SCALAR = 'scalar'
+COMMENT = 'comment'
+
+_STRUCTURE_EVENTS = {
+    KIND[ast.MapStart]: START_MAP,
+    KIND[ast.MapEnd]: END_MAP,
+    KIND[ast.ListStart]: START_LIST,
+    KIND[ast.ListEnd]: END_LIST,
+}
+_COMMENT_KIND = KIND[ast.Comment]
+
+
+# How much of the current line before the parser `_LexWindow` keeps
+_WINDOW_CONTEXT = 80
+
+
+class _LexWindow(object):
+    """The kinds of tokens, lexed as indexed and forgotten once `release`d"""
+    __slots__ = (
+        'lexemes', 'base', 'context', 'line', 'col', 'pos',
+        'kinds', 'texts', 'starts',
+    )
+
+    def __init__(self, lexemes):
+        self.lexemes = lexemes
+        # The offset of the first held token, the source before it on its
+        # line and the line and column that starts at
+        self.base = 0
+        self.context = ''
+        self.line = self.col = 1
+        # The source offset lexed up to
+        self.pos = 0
+        self.kinds = []
+        self.texts = []
+        self.starts = []
+
+    def __getitem__(self, i):
+        i -= self.base
+        kinds = self.kinds
+        while i >= len(kinds):
+            kind, text = next(self.lexemes)
+            kinds.append(kind)
+            self.texts.append(text)
+            self.starts.append(self.pos)
+            self.pos += len(text)
+        return kinds[i]
+
+    def text(self, i):
+        return self.texts[i - self.base]
+
+    def span(self, i):
+        start = self.starts[i - self.base]
+        return start, start + len(self.texts[i - self.base])
+
+    def release(self, i):
+        """Forget the tokens before `i`"""
+        n = i - self.base
+        if n <= 0:
+            return
+        dropped = self.context + ''.join(self.texts[:n])
+        line_start = dropped.rfind('\n') + 1
+        if line_start:
+            self.line += dropped.count('\n')
+            self.col = 1
+        start = max(line_start, len(dropped) - _WINDOW_CONTEXT)
+        self.col += start - line_start
+        self.context = dropped[start:]
+        del self.kinds[:n], self.texts[:n], self.starts[:n]
+        self.base = i
+
+    def error(self, i, msg):
+        start, _ = self.span(i)
+        src_offset = self.starts[0] - len(self.context)
+        return ParseError(
+            self.context + ''.join(self.texts), start - src_offset, msg,
+            src_line=self.line, src_col=self.col, src_offset=src_offset,
+        )
+
+
+class _EventTokens(object):
+    """A view of a `_LexWindow` which records the events of what is read"""
+    __slots__ = ('kinds', 'error', 'comments', 'is_key', 'events')
+
+    def __init__(self, window, comments):
+        self.kinds = window
+        self.error = window.error
+        self.comments = comments
+        # Set by `_EventFrame` when the next primitive is a map key
+        self.is_key = False
+        self.events = []
+
+    def emit(self, tp, value, i):
+        start, end = self.kinds.span(i)
+        self.events.append(Event(tp, value, start, end))
+
+    def __getitem__(self, key):
+        window = self.kinds
+        if isinstance(key, slice):
+            for i in range(key.start, key.stop):
+                kind = window[i]
+                if kind in _STRUCTURE_EVENTS:
+                    self.emit(_STRUCTURE_EVENTS[kind], None, i)
+                elif kind == _COMMENT_KIND and self.comments:
+                    self.emit(COMMENT, window.text(i).rstrip('\n'), i)
+            return ()
+        else:
+            val = DECODE[window[key]](window.text(key))
+            self.emit(KEY if self.is_key else SCALAR, val, key)
+            self.is_key = False
+            return val
+
+    def flush(self, offset):
+        """Take the events so far, the parser is done with tokens before
+        `offset`"""
+        self.kinds.release(offset)
+        ret, self.events = self.events, []
+        return ret
+
+
+class _EventFrame(_Frame):
+    """A `_Frame` which only records events, it builds nothing"""
+    __slots__ = ()
+
+    def build(self):
+        return None
+
+    def _add_item(self, val, tail):
+        pass
+
+    def _begin_item(self, tokens, offset, head):
+        tokens.is_key = self.cls is ast.Map
+        return super(_EventFrame, self)._begin_item(tokens, offset, head)
+
+    def _end(self, tokens, offset, head):
+        offset = super(_EventFrame, self)._end(tokens, offset, head)
+        if self.layout == _TOP_LEVEL:
+            tokens.emit(END_MAP, None, offset)
+        return offset
+
+
+def iter_events(src_or_stream, comments=False):
+    """Parse text, a text stream or an iterable of text chunks to `Event`s.
+
+    Comments are only given if `comments`.  The document is validated as it
+    is read, holding little more than the tokens being parsed.
+    """
+    tokens = _EventTokens(_LexWindow(iter_lexemes(src_or_stream)), comments)
+    _, offset = PT_HEAD.get(tokens, 0)
+    stack = []
+    if PT_TOP_LEVEL_MAP.match(tokens.kinds, offset) >= 0:
+        start, _ = tokens.kinds.span(offset)
+        tokens.events.append(Event(START_MAP, None, start, start))
+    offset = _start_top_level(tokens, offset, stack, _EventFrame)
+    done = False
+    while not done:
+        for event in tokens.flush(offset):
+            yield event
+        _, offset, done = _parse_step(tokens, offset, stack, _EventFrame)
+    _parse_eof(tokens, offset)
+    for event in tokens.flush(offset):
+        yield event
+
+
+_TOKEN_TYPES = frozenset(ast.TOKENS)
+_LAZY_TYPES = frozenset((ast.LazyList, ast.LazyMap))
+
+
+def _iter_unparse(ast_obj):
+    """The source of `ast_obj`, in pieces"""
+    # Nodes yet to be written, last first
+    stack = [ast_obj]
+    while stack:
+        node = stack.pop()
+        if type(node) in _TOKEN_TYPES:
+            yield node.src
+        elif type(node) in _LAZY_TYPES and not node.is_parsed:
+            yield node.source()
+        else:
+            children = []
+            for attr in node:
+                if type(attr) is tuple:
+                    children.extend(attr)
                 else:
-                    raise AssertionError('unreachable!')
-                out += '{}{}={},\n'.format(indentstr(), field, representation)
-        out += indentstr() + ')'
-        return out
+                    children.append(attr)
+            stack.extend(reversed(children))
+
+
+def unparse(ast_obj):
+    return ''.join(_iter_unparse(ast_obj))
+
+
+# About how many characters `iter_chunks` joins at a time
+_WRITE_CHUNK = 64 * 1024
+
+
+def iter_chunks(pieces):
+    """Join the strings of `pieces` into chunks to write"""
+    chunk = []
+    size = 0
+    for piece in pieces:
+        chunk.append(piece)
+        size += len(piece)
+        if size >= _WRITE_CHUNK:
+            yield ''.join(chunk)
+            del chunk[:]
+            size = 0
+    yield ''.join(chunk)
+
+
+def unparse_to(ast_obj, stream):
+    """Write the source of `ast_obj` to `stream` a chunk at a time"""
+    for chunk in iter_chunks(_iter_unparse(ast_obj)):
+        stream.write(chunk)
+
+
+_PRIMITIVE_TYPES = frozenset(ast.PRIMITIVE)
+
+
+class Spans(object):
+    """`spans[node]` is where `node` is in `unparse(ast_obj)`: `(start, end)`.
+
+    All spans are found in one walk of the ast, which parses lazy nodes.
+    """
+    __slots__ = ('_ast_obj', '_spans')
+
+    def __init__(self, ast_obj):
+        # Holding the ast keeps the ids of its nodes unique
+        self._ast_obj = ast_obj
+        # id(node): start << 32 | end
+        self._spans = spans = {}
+        offset = 0
+        # Nodes to walk and, as `(node, start)`, the ends of nodes
+        stack = [ast_obj]
+        while stack:
+            node = stack.pop()
+            tp = type(node)
+            if tp is tuple:
+                node, start = node
+                spans[id(node)] = start << 32 | offset
+            elif tp in _TOKEN_TYPES:
+                end = offset + len(node.src)
+                if tp in _PRIMITIVE_TYPES:
+                    spans[id(node)] = offset << 32 | end
+                offset = end
+            else:
+                stack.append((node, offset))
+                children = []
+                for attr in node:
+                    if type(attr) is tuple:
+                        children.extend(attr)
+                    else:
+                        children.append(attr)
+                stack.extend(reversed(children))
+
+    def __getitem__(self, node):
+        try:
+            span = self._spans[id(node)]
+        except KeyError:
+            raise KeyError(node)
+        return span >> 32, span & 0xffffffff
+
+
+def debug(ast_obj):
+    # Output still to be written: strings or `(node, indent)` to expand
+    parts = []
+    stack = [(ast_obj, 0)]
+    while stack:
+        item = stack.pop()
+        if not isinstance(item, tuple):
+            parts.append(item)
+            continue
+        node, indent = item
+        if 'src' in node._fields:
+            parts.append(repr(node))
+            continue
+        field_indent = (indent + 1) * '    '
+        el_indent = field_indent + '    '
+        out = [type(node).__name__ + '(\n']
+        for field in node._fields:
+            attr = getattr(node, field)
+            out.append('{}{}='.format(field_indent, field))
+            if attr == ():
+                out.append(repr(attr))
+            elif type(attr) is tuple:
+                out.append('(\n')
+                for el in attr:
+                    out.extend((el_indent, (el, indent + 2), ',\n'))
+                out.append(field_indent + ')')
+            elif isinstance(attr, ast.AST):
+                out.append((attr, indent + 1))
+            else:
+                raise AssertionError('unreachable!')
+            out.append(',\n')
+        out.append(indent * '    ' + ')')
+        stack.extend(reversed(out))
+    return ''.join(parts)
@@ -2,12 +2,18 @@ from __future__ import absolute_import
 from __future__ import unicode_literals
 
 import ast
+import re
 
 
 class Bool(object):
+    _values = {'true': True, 'false': False}
+
     @staticmethod
     def parse(s):
-        return ast.literal_eval(s.lower().capitalize())
+        try:
+            return Bool._values[s.lower()]
+        except KeyError:
+            return ast.literal_eval(s.lower().capitalize())
 
     @staticmethod
     def dump(v):
@@ -24,21 +30,71 @@ class Null(object):
         return 'null'
 
 
+# The decoders below handle the forms the tokenizer produces directly and
+# leave anything else to `ast.literal_eval` so they behave identically.
+_NUMBER_RE = re.compile('[-.0-9a-fA-FxXoObB][-+.0-9a-fA-FxXoObB]*$')
+
+
+def _parse_float(s):
+    if _NUMBER_RE.match(s) and ('.' in s or 'e' in s or 'E' in s):
+        try:
+            return float(s)
+        except ValueError:
+            pass
+    return ast.literal_eval(s)
+
+
 class Float(object):
-    parse = staticmethod(ast.literal_eval)
+    parse = staticmethod(_parse_float)
     dump = staticmethod(repr)
 
 
+def _parse_int(s):
+    if _NUMBER_RE.match(s):
+        try:
+            return int(s, 0)
+        except ValueError:
+            pass
+    return ast.literal_eval(s)
+
+
 class Int(object):
-    parse = staticmethod(ast.literal_eval)
+    parse = staticmethod(_parse_int)
     dump = staticmethod(repr)
 
 
+# A literal's body: no unescaped quotes and every escaped character is latin-1
+# (so the `unicode_escape` codec sees the same escapes python would)
+_BODY_RES = {
+    quote: re.compile(r'[^{0}\\]*(?:\\[\x00-\xff][^{0}\\]*)*\Z'.format(quote))
+    for quote in ('"', "'")
+}
+# Characters python's own tokenizer treats specially inside a literal
+_NOT_LITERAL_RE = re.compile('[\r\x00]')
+
+
+def _parse_string(s):
+    quote = s[:1]
+    if (
+            len(s) >= 2 and quote in _BODY_RES and s[-1] == quote and
+            not _NOT_LITERAL_RE.search(s)
+    ):
+        inner = s[1:-1]
+        if '\\' not in inner:
+            if quote not in inner:
+                return inner
+        elif _BODY_RES[quote].match(inner):
+            try:
+                escaped = inner.encode('latin-1', 'backslashreplace')
+                return escaped.decode('unicode_escape')
+            except UnicodeDecodeError:  # malformed escapes
+                pass
+    # python2 will literal_eval as bytes
+    return ast.literal_eval('u' + s)
+
+
 class String(object):
-    @staticmethod
-    def parse(s):
-        # python2 will literal_eval as bytes
-        return ast.literal_eval('u' + s)
+    parse = staticmethod(_parse_string)
 
     @staticmethod
     def dump(v):
@@ -2,15 +2,36 @@ from __future__ import absolute_import
 from __future__ import unicode_literals
 
 import collections
+import contextlib
 import functools
+import io
+import itertools
+import mmap
+import multiprocessing
+import os
 import re
+import types
 
+from dumbconf import _diskcache
+from dumbconf import _parse
 from dumbconf import _primitive
 from dumbconf import ast
-from dumbconf._parse import parse
+from dumbconf._error import ParseError
+from dumbconf._parallel import map_in_pool
+from dumbconf._parallel import parse_parallel
+from dumbconf._parse import iter_chunks
 from dumbconf._parse import parse_from_tokens
+from dumbconf._parse import Spans
 from dumbconf._parse import unparse
+from dumbconf._parse import unparse_to
+from dumbconf._parse import value_from_tokens
 from dumbconf._tokenize import BARE_WORD_RE
+from dumbconf._tokenize import BRACKETS
+from dumbconf._tokenize import token
+from dumbconf._tokenize import tokenize_bytes
+from dumbconf._tokenize import tokenize_packed
+from dumbconf._tokenize import tokenize_stream
+from dumbconf._tokenize import TokenStream
 
 
 # TODO: replace with six?
@@ -21,6 +42,15 @@ else:  # pragma: no cover (PY3)
     text_type = str
     int_types = (int,)
 
+try:
+    from collections.abc import Iterator
+    from collections.abc import Mapping
+    from collections.abc import Sequence
+except ImportError:  # pragma: no cover (PY2)
+    from collections import Iterator
+    from collections import Mapping
+    from collections import Sequence
+
 
 class Settings(collections.namedtuple(
         'Settings', ('indent', 'bare_keys', 'inline_small_containers'),
@@ -39,18 +69,51 @@ Settings.DEFAULT = Settings(-1, True, True)
 BARE_WORD_FULL_MATCH_RE = re.compile(BARE_WORD_RE.pattern + '$')
 
 
+def _add_value(frame, val):
+    ret, _, key = frame
+    if isinstance(ret, list):
+        ret.append(val)
+    else:
+        ret[key] = val
+
+
 def _python_value(ast_obj):
     if isinstance(ast_obj, ast.PRIMITIVE):
         return ast_obj.val
-    elif isinstance(ast_obj, ast.List):
-        return [_python_value(item.val) for item in ast_obj.items]
-    elif isinstance(ast_obj, ast.Map):
-        return collections.OrderedDict(
-            (_python_value(item.key), _python_value(item.val))
-            for item in ast_obj.items
-        )
-    else:
-        raise AssertionError('Unknown ast: {!r}'.format(ast_obj))
+    # [value, remaining items, key] of the containers being converted
+    stack = []
+    node = ast_obj
+    while True:
+        if isinstance(node, ast.PRIMITIVE):
+            _add_value(stack[-1], node.val)
+        elif isinstance(node, ast.List):
+            stack.append([[], iter(node.items), None])
+        elif isinstance(node, ast.Map):
+            stack.append([collections.OrderedDict(), iter(node.items), None])
+        else:
+            raise AssertionError('Unknown ast: {!r}'.format(node))
+
+        # Find the next value to convert, finishing exhausted containers
+        while True:
+            frame = stack[-1]
+            item = next(frame[1], None)
+            if item is not None:
+                if isinstance(item, ast.MapItem):
+                    frame[2] = item.key.val
+                node = item.val
+                break
+            stack.pop()
+            if not stack:
+                return frame[0]
+            _add_value(stack[-1], frame[0])
+
+
+def _is_sequence(val):
+    """Whether `val` is written as a list (strings and bytes are not)"""
+    return (
+        isinstance(val, Sequence) and
+        not isinstance(val, (bytes, bytearray, text_type))
+    )
 
 
 def _to_tokens(val, settings=Settings.DEFAULT, key=False, top_level_map=False):
@@ -68,11 +131,11 @@ def _to_tokens(val, settings=Settings.DEFAULT, key=False, top_level_map=False):
         return [ast.Int(val=val, src=_primitive.Int.dump(val))]
     elif isinstance(val, float):
         return [ast.Float(val=val, src=_primitive.Float.dump(val))]
-    elif isinstance(val, dict) and val and top_level_map:
+    elif isinstance(val, Mapping) and val and top_level_map:
         return _top_level_map_tokens(val, settings)
-    elif isinstance(val, dict):
+    elif isinstance(val, Mapping):
         return _map_tokens(val, settings)
-    elif isinstance(val, (tuple, list)):
+    elif _is_sequence(val):
         return _list_tokens(val, settings)
     else:
         raise AssertionError('Unexpected value {!r}'.format(val))
@@ -84,20 +147,20 @@ def _inline(val, settings, container_settings):
         items = container_settings.to_iter(val)
         ret.extend(container_settings.item_func(items[0], settings))
         for item in items[1:]:
-            ret.extend((ast.Comma(','), ast.Space(' ')))
+            ret.extend((token(ast.Comma, ','), token(ast.Space, ' ')))
             ret.extend(container_settings.item_func(item, settings))
     ret.append(container_settings.end)
     return ret
 
 
 def _multiline(val, settings, container_settings):
-    ret = [container_settings.start, ast.NL('\n')]
+    ret = [container_settings.start, token(ast.NL, '\n')]
     for item in container_settings.to_iter(val):
-        ret.append(ast.Indent('    ' * (settings.indented.indent)))
+        ret.append(token(ast.Indent, '    ' * (settings.indented.indent)))
         ret.extend(container_settings.item_func(item, settings.indented))
-        ret.extend((ast.Comma(','), ast.NL('\n')))
+        ret.extend((token(ast.Comma, ','), token(ast.NL, '\n')))
     if settings.indent > 0:
-        ret.append(ast.Indent('    ' * settings.indent))
+        ret.append(token(ast.Indent, '    ' * settings.indent))
     ret.append(container_settings.end)
     return ret
 
@@ -119,7 +182,7 @@ def _map_item_tokens(kv, settings):
     k, v = kv
     ret = []
     ret.extend(_to_tokens(k, settings, key=True))
-    ret.extend((ast.Colon(':'), ast.Space(' ')))
+    ret.extend((token(ast.Colon, ':'), token(ast.Space, ' ')))
     ret.extend(_to_tokens(v, settings))
     return ret
 
@@ -132,14 +195,14 @@ ContainerSettings = collections.namedtuple(
 _map_tokens = functools.partial(
     _container,
     container_settings=ContainerSettings(
-        start=ast.MapStart('{'), end=ast.MapEnd('}'),
+        start=token(ast.MapStart, '{'), end=token(ast.MapEnd, '}'),
         item_func=_map_item_tokens, to_iter=lambda m: tuple(m.items()),
     ),
 )
 _list_tokens = functools.partial(
     _container,
     container_settings=ContainerSettings(
-        start=ast.ListStart('['), end=ast.ListEnd(']'),
+        start=token(ast.ListStart, '['), end=token(ast.ListEnd, ']'),
         item_func=_to_tokens, to_iter=tuple,
     ),
 )
@@ -149,16 +212,400 @@ def _top_level_map_tokens(dct, settings):
     tokens = []
     for kv in dct.items():
         tokens.extend(_map_item_tokens(kv, settings))
-        tokens.append(ast.NL('\n'))
+        tokens.append(token(ast.NL, '\n'))
     return tokens
 
 
 def _to_ast(*args, **kwargs):
     # Run the parser to ensure a correct ast instead of building manually
-    tokens = tuple(_to_tokens(*args, **kwargs)) + (ast.EOF(''),)
+    tokens = tuple(_to_tokens(*args, **kwargs)) + (token(ast.EOF, ''),)
     return parse_from_tokens(tokens).val
 
 
+def _primitive_dump(val):
+    """How `_to_tokens` writes primitive `val`, `None` if not a primitive"""
+    if isinstance(val, text_type):
+        return _primitive.String.dump
+    elif isinstance(val, bool):
+        return _primitive.Bool.dump
+    elif val is None:
+        return _primitive.Null.dump
+    elif isinstance(val, int_types):
+        return _primitive.Int.dump
+    elif isinstance(val, float):
+        return _primitive.Float.dump
+    else:
+        return None
+
+
+_Emit = collections.namedtuple('_Emit', ('val', 'indent', 'key'))
+
+
+# Indentation by depth, deeper levels are built as needed
+_INDENTS = tuple('    ' * i for i in range(32))
+
+
+def _indent(depth):
+    if depth < len(_INDENTS):
+        return _INDENTS[depth]
+    else:
+        return '    ' * depth
+
+
+def _item_pieces(item, indent, is_map):
+    if is_map:
+        k, v = item
+        return (_Emit(k, indent, True), ': ', _Emit(v, indent, False))
+    else:
+        return (_Emit(item, indent, False),)
+
+
+def _keys_error(val):
+    return TypeError(
+        'Keys must be of type ({}) but got {}'.format(
+            ', '.join(tp.__name__ for tp in ast.PRIMITIVE),
+            type(val).__name__,
+        )
+    )
+
+
+class Encoder(object):
+    """Writes python values as source, taking the settings of `dumps`.
+
+    An encoder may be reused.  `default(value)`, if given, returns a value to
+    write in place of one of an unsupported type.
+    """
+
+    def __init__(
+            self,
+            indented=True,
+            bare_keys=True,
+            top_level_map=True,
+            inline_small_containers=True,
+            default=None,
+            key_cache_size=4096,
+    ):
+        self.indented = indented
+        self.bare_keys = bare_keys
+        self.top_level_map = top_level_map
+        self.inline_small_containers = inline_small_containers
+        self.default = default
+        self.key_cache_size = key_cache_size
+        self._keys = {}
+        self._primitives = {
+            text_type: _primitive.String.dump,
+            bool: _primitive.Bool.dump,
+            type(None): _primitive.Null.dump,
+            float: _primitive.Float.dump,
+        }
+        for tp in int_types:
+            self._primitives[tp] = _primitive.Int.dump
+        self._containers = {
+            dict: self._map_pieces,
+            collections.OrderedDict: self._map_pieces,
+            list: self._list_pieces,
+            tuple: self._list_pieces,
+            types.GeneratorType: self._iterator_pieces,
+        }
+
+    def encode(self, v):
+        return ''.join(self._iter_pieces(v))
+
+    def iter_encode(self, v):
+        """Yield the source of `v` in chunks (see `iter_dumps`)"""
+        return iter_chunks(self._iter_pieces(v))
+
+    def _key_src(self, k):
+        if type(k) is text_type:
+            src = self._keys.get(k)
+            if src is None:
+                if self.bare_keys and BARE_WORD_FULL_MATCH_RE.match(k):
+                    src = k
+                else:
+                    src = _primitive.String.dump(k)
+                if len(self._keys) >= self.key_cache_size:
+                    self._keys.clear()
+                self._keys[k] = src
+            return src
+
+        dump = _primitive_dump(k)
+        if dump is _primitive.String.dump:
+            return self._key_src(text_type(k))
+        elif dump is not None:
+            return dump(k)
+        elif self.default is not None:
+            k = self.default(k)
+            if _primitive_dump(k) is None:
+                raise _keys_error(k)
+            return self._key_src(k)
+        else:
+            raise _keys_error(k)
+
+    def _items_pieces(self, items, size, start, end, is_map, indent):
+        """The pieces of a list / map, `size` need only be known up to 2"""
+        yield start
+        if (
+                indent < 0 or
+                not size or
+                (self.inline_small_containers and size < 2)
+        ):
+            for i, item in enumerate(items):
+                if i:
+                    yield ', '
+                for piece in _item_pieces(item, indent, is_map):
+                    yield piece
+        else:
+            yield '\n'
+            item_indent = indent + 1
+            indent_src = _indent(item_indent)
+            for item in items:
+                yield indent_src
+                for piece in _item_pieces(item, item_indent, is_map):
+                    yield piece
+                yield ',\n'
+            if indent > 0:
+                yield _indent(indent)
+        yield end
+
+    def _map_pieces(self, val, indent):
+        return self._items_pieces(
+            iter(val.items()), len(val), '{', '}', True, indent,
+        )
+
+    def _list_pieces(self, val, indent):
+        return self._items_pieces(iter(val), len(val), '[', ']', False, indent)
+
+    def _iterator_pieces(self, val, indent):
+        # Only read ahead enough to tell whether it is small
+        head = tuple(itertools.islice(val, 2))
+        items = itertools.chain(head, val)
+        return self._items_pieces(items, len(head), '[', ']', False, indent)
+
+    def _other_pieces(self, val, indent):
+        """The pieces of a value of a type not in the dispatch tables"""
+        dump = _primitive_dump(val)
+        if dump is not None:
+            return iter((dump(val),))
+        elif isinstance(val, Mapping):
+            return self._map_pieces(val, indent)
+        elif _is_sequence(val):
+            return self._list_pieces(val, indent)
+        elif isinstance(val, Iterator):
+            return self._iterator_pieces(val, indent)
+        elif self.default is not None:
+            return iter((_Emit(self.default(val), indent, False),))
+        else:
+            raise TypeError(
+                'Object of type {} is not serializable'.format(
+                    type(val).__name__,
+                )
+            )
+
+    def _top_level_map_pieces(self, dct):
+        for item in dct.items():
+            for piece in _item_pieces(item, 0, True):
+                yield piece
+            yield '\n'
+
+    def _iter_pieces(self, val, indent=None):
+        """Yield the pieces of the source `_to_ast` would produce for `val`.
+
+        `val` is the whole document unless an `indent` is given for it.
+        """
+        # The ids of the values being written (containers and values given to
+        # `default`) by stack entry, to catch a value containing itself
+        open_ids = [None]
+        if indent is not None:
+            stack = [iter((_Emit(val, indent, False),))]
+        elif (
+                self.indented and self.top_level_map and
+                isinstance(val, Mapping) and val
+        ):
+            stack = [self._top_level_map_pieces(val)]
+            open_ids = [id(val)]
+        else:
+            stack = [iter((_Emit(val, 0 if self.indented else -1, False),))]
+        markers = set(open_ids)
+
+        primitives = self._primitives
+        containers = self._containers
+        while stack:
+            piece = next(stack[-1], None)
+            if piece is None:
+                stack.pop()
+                markers.discard(open_ids.pop())
+            elif type(piece) is not _Emit:
+                yield piece
+            elif piece.key:
+                yield self._key_src(piece.val)
+            else:
+                val = piece.val
+                dump = primitives.get(type(val))
+                if dump is not None:
+                    yield dump(val)
+                    continue
+                if id(val) in markers:
+                    raise ValueError('Circular reference detected')
+                markers.add(id(val))
+                open_ids.append(id(val))
+                container = containers.get(type(val), self._other_pieces)
+                stack.append(container(val, piece.indent))
+
+
+_MAP, _LIST, _TOP_LEVEL_MAP = range(3)
+
+
+class _Frame(object):
+    """A list / map being written by a `Writer`"""
+    __slots__ = ('kind', 'indent', 'written', 'has_key')
+
+    def __init__(self, kind, indent):
+        self.kind = kind
+        self.indent = indent
+        # Whether any items (or comments) have been written
+        self.written = False
+        # Whether a map's key has been written without its value
+        self.has_key = False
+
+
+class Writer(object):
+    """Writes a document to `stream` piece by piece, see `Encoder`.
+
+    Maps / lists begun here are multiline (if `indented`) even if small.
+    """
+
+    def __init__(self, stream, **settings):
+        self.stream = stream
+        self._encoder = Encoder(**settings)
+        self._stack = []
+        self._done = False
+        self._buf = []
+        self._size = 0
+
+    def _write(self, piece):
+        self._buf.append(piece)
+        self._size += len(piece)
+        if self._size >= _parse._WRITE_CHUNK:
+            self.flush()
+
+    def flush(self):
+        self.stream.write(''.join(self._buf))
+        del self._buf[:]
+        self._size = 0
+
+    def _begin_line(self, frame):
+        if not frame.written and frame.kind != _TOP_LEVEL_MAP:
+            self._write('\n')
+        frame.written = True
+        if frame.kind != _TOP_LEVEL_MAP:
+            self._write(_indent(frame.indent + 1))
+
+    def _begin_item(self, frame):
+        if frame.indent >= 0:
+            self._begin_line(frame)
+        else:
+            if frame.written:
+                self._write(', ')
+            frame.written = True
+
+    def _begin_value(self):
+        """Start the next value, returning its indent (`None` at the root)"""
+        if self._done:
+            raise TypeError('The document is already complete.')
+        elif not self._stack:
+            return None
+        frame = self._stack[-1]
+        if frame.kind == _LIST:
+            self._begin_item(frame)
+        elif not frame.has_key:
+            raise TypeError('Expected a key.')
+        if frame.kind == _TOP_LEVEL_MAP:
+            return 0
+        elif frame.indent < 0:
+            return -1
+        else:
+            return frame.indent + 1
+
+    def _end_value(self):
+        if not self._stack:
+            self._done = True
+            self.flush()
+            return
+        frame = self._stack[-1]
+        frame.has_key = False
+        if frame.kind == _TOP_LEVEL_MAP:
+            self._write('\n')
+        elif frame.indent >= 0:
+            self._write(',\n')
+
+    def _begin(self, kind, start):
+        indent = self._begin_value()
+        if indent is None:
+            if kind == _MAP and self._encoder.top_level_map:
+                kind = _TOP_LEVEL_MAP
+            indent = 0 if self._encoder.indented else -1
+        if kind == _TOP_LEVEL_MAP and not self._encoder.indented:
+            kind = _MAP
+        if kind != _TOP_LEVEL_MAP:
+            self._write(start)
+        self._stack.append(_Frame(kind, indent))
+
+    def begin_map(self):
+        self._begin(_MAP, '{')
+
+    def begin_list(self):
+        self._begin(_LIST, '[')
+
+    def key(self, k):
+        if self._done or not self._stack or self._stack[-1].kind == _LIST:
+            raise TypeError('Keys can only be written in a map.')
+        frame = self._stack[-1]
+        if frame.has_key:
+            raise TypeError('Expected a value.')
+        self._begin_item(frame)
+        self._write(self._encoder._key_src(k))
+        self._write(': ')
+        frame.has_key = True
+
+    def value(self, v):
+        indent = self._begin_value()
+        for piece in self._encoder._iter_pieces(v, indent):
+            self._write(piece)
+        self._end_value()
+
+    def end(self):
+        if self._done or not self._stack:
+            raise TypeError('There is no map / list to end.')
+        frame = self._stack[-1]
+        if frame.has_key:
+            raise TypeError('Expected a value.')
+        self._stack.pop()
+        if frame.kind == _TOP_LEVEL_MAP:
+            if not frame.written:
+                self._write('{}')
+        else:
+            if frame.written and frame.indent > 0:
+                self._write(_indent(frame.indent))
+            self._write('}' if frame.kind == _MAP else ']')
+        self._end_value()
+
+    def comment(self, text):
+        """Write `# text` on a line of its own, before the next item"""
+        if not self._encoder.indented:
+            raise TypeError('Comments can only be written when `indented`.')
+        elif '\n' in text or '\r' in text:
+            raise ValueError('Comments must be a single line.')
+        elif self._done:
+            raise TypeError('The document is already complete.')
+        if self._stack:
+            frame = self._stack[-1]
+            if frame.has_key:
+                raise TypeError('Expected a value.')
+            if frame.kind != _TOP_LEVEL_MAP:
+                self._begin_line(frame)
+        self._write('# {}\n'.format(text))
+
+
 def _key_index(val, key):
     if isinstance(val, ast.Map):
         for i, item in enumerate(val.items):
@@ -275,6 +722,40 @@ def _set_key(obj, chain, new_value):
     return _modify_items(obj, chain, _set_key_cb, new_value)
 
 
+def _skip_value(tokens, i):
+    """The token after the value starting at token `i`"""
+    if tokens.kinds[i] in BRACKETS:
+        return tokens.bracket_end(i) + 1
+    else:
+        return i + 1
+
+
+def _skip_item(tokens, i, item):
+    i += len(item.head)
+    if isinstance(item, ast.MapItem):
+        i += 1 + len(item.inner)
+    return _skip_value(tokens, i) + len(item.tail)
+
+
+def _token_span(tokens, doc, chain):
+    """`span` of the value at `chain`, skipping lists / maps by brackets"""
+    i = len(doc.head)
+    end = len(tokens) - 1 - len(doc.tail)
+    obj = doc
+    for key in chain:
+        container = obj.val
+        index = _key_index(container, key)
+        i += len(container.head)
+        for item in container.items[:index]:
+            i = _skip_item(tokens, i, item)
+        obj = container.items[index]
+        i += len(obj.head)
+        if isinstance(obj, ast.MapItem):
+            i += 1 + len(obj.inner)
+        end = _skip_value(tokens, i)
+    return tokens.starts[i], tokens.starts[end]
+
+
 class AstProxyChain(object):
     def __init__(self, ast_proxy, chain):
         self._ast_proxy = ast_proxy
@@ -311,17 +792,71 @@ class AstProxyChain(object):
     def python_value(self):
         return _python_value(_get(self.root, self.chain()).val)
 
+    def span(self):
+        """`(start, end)` of the value in the document's source.
+
+        Once the document is edited, that is its `dumps_roundtrip`.
+        """
+        tokens = self._ast_proxy._unedited_tokens()
+        if tokens is not None:
+            return _token_span(tokens, self.root, self.chain())
+        else:
+            spans = self._ast_proxy._root_spans()
+            return spans[_get(self.root, self.chain()).val]
+
+    def source(self):
+        """The source of the value, sliced from the document's if unedited"""
+        tokens = self._ast_proxy._unedited_tokens()
+        if tokens is not None:
+            start, end = _token_span(tokens, self.root, self.chain())
+            return tokens.src[start:end]
+        else:
+            return unparse(_get(self.root, self.chain()).val)
+
 
 class AstProxy(AstProxyChain):
-    """The base case for our ast proxy"""
+    """The base case for our ast proxy (and the tokens it was parsed from)"""
 
-    def __init__(self, ast_obj):
+    def __init__(self, ast_obj, tokens=None):
         super(AstProxy, self).__init__(self, ())
         self._ast_obj = ast_obj
+        self._tokens = tokens
+        self._src_ast = ast_obj
+        # (the ast they are for, its `Spans`)
+        self._spans = None
+
+    def _unedited_tokens(self):
+        """The tokens of the document if it is as it was parsed from them"""
+        if self._ast_obj is self._src_ast:
+            return self._tokens
+        else:
+            return None
+
+    def _root_spans(self):
+        root = self._ast_obj
+        if self._spans is None or self._spans[0] is not root:
+            self._spans = (root, Spans(root))
+        return self._spans[1]
+
+
+def _check_workers(lazy, workers):
+    if lazy and workers is not None:
+        raise TypeError('`lazy` and `workers` cannot be used together.')
+    return workers is not None and workers > 1
+
 
+def loads_roundtrip(s, lazy=False, workers=None):
+    """Load `s` for editing.
 
-def loads_roundtrip(s):
-    return AstProxy(parse(s))
+    If `lazy`, nested lists / maps are only parsed when first indexed into.
+    If `workers`, a large top level map is parsed in that many processes.
+    """
+    if _check_workers(lazy, workers):
+        doc = parse_parallel(s, workers)
+        if doc is not None:
+            return AstProxy(doc)
+    tokens = tokenize_packed(s)
+    return AstProxy(parse_from_tokens(tokens, lazy=lazy), tokens)
 
 
 def dumps_roundtrip(ast_proxy):
@@ -329,15 +864,131 @@ def dumps_roundtrip(ast_proxy):
 
 
 def load_roundtrip(stream):
-    return loads_roundtrip(stream.read())
+    tokens = tokenize_stream(stream)
+    return AstProxy(parse_from_tokens(tokens), tokens)
 
 
 def dump_roundtrip(ast_proxy, stream):
-    stream.write(dumps_roundtrip(ast_proxy))
+    unparse_to(ast_proxy._ast_obj, stream)
+
+
+def loads(s, lazy=False, workers=None):
+    """Load `s` to python values.
+
+    As for `loads_roundtrip`, lazy lists / maps being read-only.
+    """
+    if _check_workers(lazy, workers):
+        val = parse_parallel(s, workers, value=True)
+        if val is not None:
+            return val
+    return value_from_tokens(tokenize_packed(s), lazy=lazy)
+
+
+def loads_bytes(b):
+    """`loads` for UTF-8 encoded bytes (or an mmap)"""
+    return value_from_tokens(tokenize_bytes(b))
+
+
+@contextlib.contextmanager
+def _mapped(path):
+    with io.open(path, 'rb') as f:
+        # mmap refuses to map an empty file
+        if not os.fstat(f.fileno()).st_size:
+            yield b''
+        else:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                yield mapped
+            finally:
+                mapped.close()
+
+
+def load_path(path, cache_dir=None):
+    """`load` a file by tokenizing its memory-mapped bytes.
+
+    If `cache_dir`, the value is also cached there while the file is unchanged.
+    Only trusted users should be able to write to it.
+    """
+    with _mapped(path) as b:
+        if cache_dir is None:
+            return loads_bytes(b)
+        entry = _diskcache.entry_path(cache_dir, path)
+        key = _diskcache.entry_key(os.stat(path), b)
+        val = _diskcache.read(entry, key)
+        if val is _diskcache.MISSING:
+            val = loads_bytes(b)
+            _diskcache.write(entry, key, val)
+        return val
 
 
-def loads(s):
-    return loads_roundtrip(s).python_value()
+_LOAD_MANY_MODES = ('value', 'roundtrip')
+
+
+def _read_text(path):
+    with io.open(path, encoding='UTF-8', newline='') as f:
+        return f.read()
+
+
+def _load_one(path, mode):
+    try:
+        if mode == 'value':
+            return load_path(path)
+        else:
+            tokens = tokenize_packed(_read_text(path))
+            return AstProxy(parse_from_tokens(tokens), tokens)
+    except ParseError as e:
+        return e
+
+
+def _load_packed(args):
+    """`_load_one` in a worker, as validated tokens (quick to pickle)"""
+    path, mode = args
+    if mode == 'value':
+        return _load_one(path, mode)
+    try:
+        tokens = tokenize_packed(_read_text(path))
+        parse_from_tokens(tokens)
+    except ParseError as e:
+        return e
+    return tokens.src, tokens.kinds, tokens.starts, tokens.ends
+
+
+def _from_packed(ret, mode):
+    if mode == 'value' or isinstance(ret, ParseError):
+        return ret
+    else:
+        tokens = TokenStream(*ret)
+        return AstProxy(parse_from_tokens(tokens, lazy=True), tokens)
+
+
+def load_many(paths, workers=None, mode='value'):
+    """Load files to python values or (`mode='roundtrip'`) for editing.
+
+    A file which fails to parse has its `ParseError` in place of its result.
+    """
+    if mode not in _LOAD_MANY_MODES:
+        raise ValueError('Expected mode to be one of ({}) but got {!r}'.format(
+            ', '.join(_LOAD_MANY_MODES), mode,
+        ))
+    paths = list(paths)
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    if workers <= 1 or len(paths) <= 1:
+        return [_load_one(path, mode) for path in paths]
+    args = [(path, mode) for path in paths]
+    results = map_in_pool(_load_packed, args, workers)
+    return [_from_packed(ret, mode) for ret in results]
+
+
+# The `Encoder`s of `dumps` / `iter_dumps`, by their settings
+_ENCODERS = {}
+
+
+def _encoder(*settings):
+    encoder = _ENCODERS.get(settings)
+    if encoder is None:
+        encoder = _ENCODERS.setdefault(settings, Encoder(*settings))
+    return encoder
 
 
 def dumps(
@@ -347,17 +998,28 @@ def dumps(
         top_level_map=True,
         inline_small_containers=True,
 ):
-    settings = Settings(
-        indent=0 if indented else -1,
-        bare_keys=bare_keys,
-        inline_small_containers=inline_small_containers,
-    )
-    return unparse(_to_ast(v, settings, top_level_map=top_level_map))
+    return _encoder(
+        indented, bare_keys, top_level_map, inline_small_containers,
+    ).encode(v)
+
+
+def iter_dumps(
+        v,
+        indented=True,
+        bare_keys=True,
+        top_level_map=True,
+        inline_small_containers=True,
+):
+    """Yield the source `dumps` would return in chunks, as `val` is read"""
+    return _encoder(
+        indented, bare_keys, top_level_map, inline_small_containers,
+    ).iter_encode(v)
 
 
 def load(stream):
-    return loads(stream.read())
+    return value_from_tokens(tokenize_stream(stream))
 
 
 def dump(v, stream, **kwargs):
-    stream.write(dumps(v, **kwargs))
+    for chunk in iter_dumps(v, **kwargs):
+        stream.write(chunk)
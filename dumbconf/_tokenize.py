@@ -1,10 +1,12 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 
+import array
+import bisect
 import re
 
-from dumbconf import _primitive
 from dumbconf import ast
+from dumbconf._error import index_lines
 from dumbconf._error import ParseError
 
 
@@ -38,12 +40,13 @@ INT_RE = re.compile('-?' + _or(
 STRING_RE = re.compile(_or(
     r"'[^\n'\\]*(?:\\.[^\n'\\]*)*'", r'"[^\n"\\]*(?:\\.[^\n"\\]*)*"',
 ))
+_KEYWORDS = BOOL_TOKENS + ('null',)
 BARE_WORD_RE = re.compile(
     '[A-Za-z_][A-Za-z0-9_-]*' +
     # Followed by some non-identifier
     '(?![A-Za-z0-9_-])' +
     # But not our bool / null tokens
-    _nor(*BOOL_TOKENS) + _nor('null'),
+    _nor(*_KEYWORDS),
 )
 
 LIST_START_RE = re.compile(r'\[')
@@ -53,49 +56,428 @@ MAP_START_RE = re.compile('{')
 MAP_END_RE = re.compile('}')
 
 
-def _reg_parse(reg, cls, src, offset):
-    match = reg.match(src, offset)
-    return cls(match.group()), match.end()
+tokenize_processors = (
+    (BARE_WORD_RE, ast.BareWordKey),
+    (BOOL_RE, ast.Bool),
+    (NULL_RE, ast.Null),
+    (FLOAT_RE, ast.Float),
+    (INT_RE, ast.Int),
+    (STRING_RE, ast.String),
+    (LIST_START_RE, ast.ListStart),
+    (LIST_END_RE, ast.ListEnd),
+    (MAP_START_RE, ast.MapStart),
+    (MAP_END_RE, ast.MapEnd),
+    (COLON_RE, ast.Colon),
+    (COMMA_RE, ast.Comma),
+    (COMMENT_RE, ast.Comment),
+    (INDENT_RE, ast.Indent),
+    (NL_RE, ast.NL),
+    (SPACE_RE, ast.Space),
+)
 
 
-def _reg_parse_val(reg, cls, to_val_func, src, offset):
-    match = reg.match(src, offset)
-    val = to_val_func(match.group())
-    return cls(val, match.group()), match.end()
+def _master_re(processors):
+    """Combine the processors into a single alternation.
 
+    Alternation takes the first alternative which matches, as trying each
+    regex in order did.
+    """
+    return re.compile('|'.join(
+        '(?P<{}>{})'.format(cls.__name__, reg.pattern)
+        for reg, cls in processors
+    ))
 
-tokenize_processors = (
-    (BARE_WORD_RE, _reg_parse_val, ast.BareWordKey, _primitive.BareWord.parse),
-    (BOOL_RE, _reg_parse_val, ast.Bool, _primitive.Bool.parse),
-    (NULL_RE, _reg_parse_val, ast.Null, _primitive.Null.parse),
-    (FLOAT_RE, _reg_parse_val, ast.Float, _primitive.Float.parse),
-    (INT_RE, _reg_parse_val, ast.Int, _primitive.Int.parse),
-    (STRING_RE, _reg_parse_val, ast.String, _primitive.String.parse),
-    (LIST_START_RE, _reg_parse, ast.ListStart),
-    (LIST_END_RE, _reg_parse, ast.ListEnd),
-    (MAP_START_RE, _reg_parse, ast.MapStart),
-    (MAP_END_RE, _reg_parse, ast.MapEnd),
-    (COLON_RE, _reg_parse, ast.Colon),
-    (COMMA_RE, _reg_parse, ast.Comma),
-    (COMMENT_RE, _reg_parse, ast.Comment),
-    (INDENT_RE, _reg_parse, ast.Indent),
-    (NL_RE, _reg_parse, ast.NL),
-    (SPACE_RE, _reg_parse, ast.Space),
+
+TOKEN_RE = _master_re(tokenize_processors)
+# The patterns are ascii so this matches the same tokens in UTF-8 bytes
+BYTES_TOKEN_RE = re.compile(TOKEN_RE.pattern.encode('UTF-8'))
+
+# The furthest past the end of a match the regexes look: an exponent such as
+# `e-1` following a float or another `    ` following an indent.  No regex
+# looks past a newline.
+_LOOKAHEAD = 4
+# Except for `BARE_WORD_RE`, which rejects `true` / `false` / `null` by
+# looking over the rest of the run of identifier characters, however long
+IDENTIFIER_RUN_RE = re.compile('[A-Za-z0-9_-]*')
+# The furthest before the start of a match the regexes look: `BARE_WORD_RE`
+# rejecting a word which ends a keyword begun by the token before it
+_LOOKBEHIND = max(len(keyword) for keyword in _KEYWORDS) - 1
+_IDENTIFIER_CHARS = frozenset(
+    'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_-',
 )
 
+# Tokens are identified by a "kind": their index in `ast.TOKENS`
+KIND = {tp: kind for kind, tp in enumerate(ast.TOKENS)}
+EOF_KIND = KIND[ast.EOF]
 
-def tokenize(src, offset=0):
+
+def _group_kinds():
+    ret = [None] * (TOKEN_RE.groups + 1)
+    for _, cls in tokenize_processors:
+        ret[TOKEN_RE.groupindex[cls.__name__]] = KIND[cls]
+    return tuple(ret)
+
+
+# Trivia / punctuation is the same every time it occurs so rather than a token
+# per occurrence, these share a single (flyweight) token
+SHARED_SRC = {
+    ast.Colon: ':', ast.Comma: ',', ast.NL: '\n', ast.Space: ' ',
+    ast.ListStart: '[', ast.ListEnd: ']', ast.MapStart: '{', ast.MapEnd: '}',
+    ast.EOF: '',
+}
+# As are indents, up to this deep
+_SHARED_INDENT = 64
+_INDENTS = {
+    '    ' * depth: ast.Indent('    ' * depth)
+    for depth in range(1, _SHARED_INDENT + 1)
+}
+
+
+def _indent(src):
+    try:
+        return _INDENTS[src]
+    except KeyError:
+        return ast.Indent(src)
+
+
+def _make_token(tp):
+    if tp in ast.PRIMITIVE:
+        return tp.from_src
+    elif tp in SHARED_SRC:
+        token = tp(SHARED_SRC[tp])
+        return lambda src: token
+    elif tp is ast.Indent:
+        return _indent
+    else:
+        return tp
+
+
+# kind -> function creating the token from its source.  Primitive values are
+# decoded lazily (see `ast.PRIMITIVE`) and trivia / punctuation is shared
+MAKE_TOKEN = tuple(_make_token(tp) for tp in ast.TOKENS)
+# kind -> function decoding a primitive's value from its source
+DECODE = tuple(
+    tp.parse if tp in ast.PRIMITIVE else None for tp in ast.TOKENS
+)
+# `TOKEN_RE` match.lastindex -> kind
+GROUP_KIND = _group_kinds()
+
+# start kind -> end kind of lists / maps
+BRACKETS = {
+    KIND[ast.ListStart]: KIND[ast.ListEnd],
+    KIND[ast.MapStart]: KIND[ast.MapEnd],
+}
+_BRACKET_RE = re.compile('[{}]'.format(''.join(
+    '\\x{:02x}'.format(kind) for pair in BRACKETS.items() for kind in pair
+)).encode('ascii'))
+
+
+def token(cls, src):
+    """`cls(src)`, the shared token for trivia / punctuation"""
+    return MAKE_TOKEN[KIND[cls]](src)
+
+
+def match_brackets(kinds):
+    """The offsets of the list / map starts and ends (0 if unclosed)"""
+    starts, ends = array.array('I'), array.array('I')
+    stack = []
+    for match in _BRACKET_RE.finditer(kinds):
+        i = match.start()
+        kind = kinds[i]
+        if kind in BRACKETS:
+            stack.append((len(starts), BRACKETS[kind]))
+            starts.append(i)
+            ends.append(0)
+        # A mismatched end is left for the parser to report
+        elif stack and stack[-1][1] == kind:
+            ends[stack.pop()[0]] = i
+    return starts, ends
+
+
+class TokenStream(object):
+    """A compact sequence of tokens: kinds and offsets into `src`"""
+    __slots__ = ('src', 'kinds', 'starts', 'ends', '_line_starts', '_brackets')
+
+    def __init__(self, src, kinds, starts, ends):
+        self.src = src
+        self.kinds = kinds
+        self.starts = starts
+        self.ends = ends
+        self._line_starts = None
+        self._brackets = None
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            indices = range(*key.indices(len(self.kinds)))
+            return tuple(self._token(i) for i in indices)
+        else:
+            return self._token(key)
+
+    def __iter__(self):
+        for i in range(len(self.kinds)):
+            yield self._token(i)
+
+    def _token(self, i):
+        return MAKE_TOKEN[self.kinds[i]](self.text(i))
+
+    def text(self, i):
+        return self.src[self.starts[i]:self.ends[i]]
+
+    def source(self, first, last):
+        """The source of the tokens `first` to `last` (inclusive)"""
+        return self.src[self.starts[first]:self.ends[last]]
+
+    def bracket_end(self, i):
+        """The end matching the list / map start at `i`, or -1"""
+        if self._brackets is None:
+            self._brackets = match_brackets(self.kinds)
+        starts, ends = self._brackets
+        index = bisect.bisect_left(starts, i)
+        if index < len(starts) and starts[index] == i and ends[index]:
+            return ends[index]
+        else:
+            return -1
+
+    def value(self, i):
+        """The decoded value of a primitive token"""
+        return DECODE[self.kinds[i]](self.text(i))
+
+    def line_starts(self):
+        """`index_lines(src)`, computed the first time it is needed"""
+        if self._line_starts is None:
+            self._line_starts = index_lines(self.src)
+        return self._line_starts
+
+    def error(self, i, msg):
+        return ParseError(
+            self.src, self.starts[i], msg, line_starts=self.line_starts(),
+        )
+
+
+class BytesTokenStream(TokenStream):
+    """A `TokenStream` over UTF-8 encoded bytes (or an mmap)"""
+    __slots__ = ()
+
+    def text(self, i):
+        return self.src[self.starts[i]:self.ends[i]].decode('UTF-8')
+
+
+def _tokenize_packed(cls, token_re, src, offset):
     srclen = len(src)
-    tokens = []
+    kinds, starts, ends = array.array('B'), array.array('I'), array.array('I')
+    match_token = token_re.match
+    group_kind = GROUP_KIND
     while offset < srclen:
-        for processor in tokenize_processors:
-            reg, func = processor[:2]
-            args = processor[2:] + (src, offset)
-            if reg.match(src, offset):
-                token, offset = func(reg, *args)
-                tokens.append(token)
+        match = match_token(src, offset)
+        if match is None:
+            raise ParseError(src, offset, 'Unexpected token')
+        kinds.append(group_kind[match.lastindex])
+        starts.append(offset)
+        offset = match.end()
+        ends.append(offset)
+    kinds.append(EOF_KIND)
+    starts.append(srclen)
+    ends.append(srclen)
+    return cls(src, kinds, starts, ends)
+
+
+def tokenize_packed(src, offset=0):
+    return _tokenize_packed(TokenStream, TOKEN_RE, src, offset)
+
+
+# Multi-byte UTF-8 sequences are only made of these, so each run of them
+# can be checked on its own
+_NON_ASCII_RE = re.compile(b'[\x80-\xff]+')
+
+
+def _check_utf8(src, offset):
+    for match in _NON_ASCII_RE.finditer(src, offset):
+        try:
+            match.group().decode('UTF-8')
+        except UnicodeDecodeError as e:
+            raise ParseError(src, match.start() + e.start, 'Invalid UTF-8')
+
+
+def tokenize_bytes(src, offset=0):
+    """Tokenize UTF-8 encoded bytes (or an mmap) without decoding them"""
+    _check_utf8(src, offset)
+    return _tokenize_packed(BytesTokenStream, BYTES_TOKEN_RE, src, offset)
+
+
+def tokenize(src, offset=0):
+    return tuple(tokenize_packed(src, offset))
+
+
+def _shifted(offsets, delta):
+    if not delta:
+        return offsets
+    return array.array('I', [offset + delta for offset in offsets])
+
+
+def retokenize(tokens, offset, deleted, inserted):
+    """Update a `TokenStream` for replacing `deleted` characters at `offset`.
+
+    Only the tokens around the edit are lexed again.
+    """
+    old_src, old_starts = tokens.src, tokens.starts
+    src = old_src[:offset] + inserted + old_src[offset + deleted:]
+    srclen = len(src)
+    delta = len(inserted) - deleted
+    edit_end = offset + len(inserted)
+
+    # A bare word may have looked at the edit over a run of identifier
+    # characters, see `IDENTIFIER_RUN_RE`
+    run_start = offset
+    while run_start and old_src[run_start - 1] in _IDENTIFIER_CHARS:
+        run_start -= 1
+    first = bisect.bisect_right(
+        tokens.ends, min(offset - _LOOKAHEAD, run_start),
+    )
+    pos = tokens.starts[first]
+    kinds, starts, ends = array.array('B'), array.array('I'), array.array('I')
+    match_token = TOKEN_RE.match
+    group_kind = GROUP_KIND
+    while True:
+        # The old tokens can be reused from here if one starts here and sees
+        # the same characters behind it (for the lookbehind assertions)
+        old_pos = pos - delta
+        if (
+                pos >= edit_end and
+                src[max(pos - _LOOKBEHIND, 0):pos] ==
+                old_src[max(old_pos - _LOOKBEHIND, 0):old_pos]
+        ):
+            resync = bisect.bisect_left(old_starts, old_pos)
+            if resync < len(old_starts) and old_starts[resync] == old_pos:
                 break
+
+        match = match_token(src, pos)
+        if match is not None:
+            kinds.append(group_kind[match.lastindex])
+            starts.append(pos)
+            pos = match.end()
+            ends.append(pos)
+        elif pos == srclen:
+            kinds.append(EOF_KIND)
+            starts.append(srclen)
+            ends.append(srclen)
+            resync = len(old_starts)
+            break
         else:
-            raise ParseError(src, offset, 'Unexpected token')
-    tokens.append(ast.EOF(''))
-    return tuple(tokens)
+            raise ParseError(src, pos, 'Unexpected token')
+
+    return TokenStream(
+        src,
+        tokens.kinds[:first] + kinds + tokens.kinds[resync:],
+        old_starts[:first] + starts + _shifted(old_starts[resync:], delta),
+        tokens.ends[:first] + ends + _shifted(tokens.ends[resync:], delta),
+    )
+
+
+# Source is joined in blocks of this many tokens when packing tokens
+_JOIN_EVERY = 4096
+
+
+def _pack(lexemes):
+    """Pack an iterable of `(kind, text)` into a `TokenStream`"""
+    kinds, starts, ends = array.array('B'), array.array('I'), array.array('I')
+    blocks = []
+    pieces = []
+    offset = 0
+    for kind, text in lexemes:
+        kinds.append(kind)
+        starts.append(offset)
+        offset += len(text)
+        ends.append(offset)
+        pieces.append(text)
+        if len(pieces) == _JOIN_EVERY:
+            blocks.append(''.join(pieces))
+            del pieces[:]
+    blocks.append(''.join(pieces))
+    return TokenStream(''.join(blocks), kinds, starts, ends)
+
+
+def pack_tokens(tokens):
+    return _pack((KIND[type(token)], token.src) for token in tokens)
+
+
+_CHUNK_SIZE = 8192
+
+
+def _chunks(stream, chunk_size):
+    if isinstance(stream, type('')):
+        return iter((stream,))
+    elif hasattr(stream, 'read'):
+        return iter(lambda: stream.read(chunk_size), '')
+    else:
+        return iter(stream)
+
+
+def _lex(chunks):
+    """Lex an iterable of text chunks into `(kind, text)`, buffering little"""
+    match_token = TOKEN_RE.match
+    group_kind = GROUP_KIND
+    buf = ''
+    pos = 0
+    eof = False
+    # offset, line and column of `buf[0]` in the document
+    base = 0
+    line = col = 1
+    while True:
+        match = match_token(buf, pos)
+        if (
+                not eof and
+                buf.find('\n', pos) == -1 and (
+                    match is None or
+                    match.end() + _LOOKAHEAD > len(buf) or
+                    IDENTIFIER_RUN_RE.match(buf, pos).end() == len(buf)
+                )
+        ):
+            chunk = next(chunks, None)
+            if chunk is None:
+                eof = True
+            else:
+                # Keep what the lookbehind assertions look at
+                keep = max(pos - _LOOKBEHIND, 0)
+                dropped, buf, pos = buf[:keep], buf[keep:] + chunk, pos - keep
+                base += keep
+                newlines = dropped.count('\n')
+                if newlines:
+                    line += newlines
+                    col = len(dropped) - dropped.rfind('\n')
+                else:
+                    col += len(dropped)
+        elif match is not None:
+            yield group_kind[match.lastindex], match.group()
+            pos = match.end()
+        elif eof and pos == len(buf):
+            yield EOF_KIND, ''
+            return
+        else:
+            # Report the error in the context of its line (or as much of the
+            # line as is still buffered)
+            start = buf.rfind('\n', 0, pos) + 1
+            if start:
+                line, col = line + buf.count('\n', 0, start), 1
+            raise ParseError(
+                buf[start:], pos - start, 'Unexpected token',
+                src_line=line, src_col=col, src_offset=base + start,
+            )
+
+
+def iter_lexemes(stream, chunk_size=_CHUNK_SIZE):
+    """Lex text, a text stream or text chunks into `(kind, text)`"""
+    return _lex(_chunks(stream, chunk_size))
+
+
+def iter_tokens(stream, chunk_size=_CHUNK_SIZE):
+    """Tokenize a text stream (or an iterable of text chunks) lazily."""
+    for kind, text in iter_lexemes(stream, chunk_size):
+        yield MAKE_TOKEN[kind](text)
+
+
+def tokenize_stream(stream, chunk_size=_CHUNK_SIZE):
+    """Like `iter_tokens` but packed into a `TokenStream`"""
+    return _pack(iter_lexemes(stream, chunk_size))
@@ -4,13 +4,8 @@ from __future__ import unicode_literals
 
 import collections
 
-from dumbconf._error import ParseError
-
-
-def _tokens_to_src_offset(tokens, offset):
-    src = ''.join(token.src for token in tokens)
-    offset = sum(len(token.src) for token in tokens[:offset])
-    return src, offset
+from dumbconf import ast
+from dumbconf._tokenize import KIND
 
 
 def _pattern_expected_tokens(pattern):
@@ -41,16 +36,6 @@ def _pattern_expected_tokens(pattern):
     return tuple(sorted(possible, key=lambda cls: cls.__name__))
 
 
-def pattern_expected(tokens, offset, pattern):
-    expected = _pattern_expected_tokens(pattern)
-    msg = 'Expected one of ({}) but received {}'.format(
-        ', '.join(cls.__name__ for cls in expected),
-        type(tokens[offset]).__name__,
-    )
-    src, offset = _tokens_to_src_offset(tokens, offset)
-    raise ParseError(src, offset, msg)
-
-
 class Pattern(collections.namedtuple('Pattern', ('sequence',))):
     __slots__ = ()
 
@@ -72,55 +57,131 @@ class Or(collections.namedtuple('Or', ('choices',))):
 Star = collections.namedtuple('Star', ('pattern',))
 
 
-class Match(collections.namedtuple('Match', ('start', 'end', 'tokens'))):
-    __slots__ = ()
+class Matcher(object):
+    """A pattern compiled by `compile_pattern`.
 
-    def match(self):
-        return self.tokens[self.start:self.end], self.end
+    `match(kinds, offset)` returns the offset after the match or -1.
+    """
+    __slots__ = ('pattern', 'match', 'first', 'nullable', 'parts', 'expected')
+
+    def __init__(self, pattern, match, first, nullable, parts=()):
+        self.pattern = pattern
+        self.match = match
+        self.first = first
+        self.nullable = nullable
+        # For a sequence, the failing part determines the error
+        self.parts = parts
+        self.expected = ', '.join(
+            cls.__name__ for cls in _pattern_expected_tokens(pattern)
+        )
+
+    def get(self, tokens, offset, single=False):
+        end = self.match(tokens.kinds, offset)
+        if end < 0:
+            self.raise_expected(tokens, offset)
+        elif single:
+            return tokens[offset], end
+        else:
+            return tokens[offset:end], end
+
+    def raise_expected(self, tokens, offset):
+        """Raise what the failed match (or its failing part) expected"""
+        failed = self
+        for part in self.parts:
+            end = part.match(tokens.kinds, offset)
+            if end < 0:
+                failed = part
+                break
+            offset = end
+        msg = 'Expected one of ({}) but received {}'.format(
+            failed.expected, ast.TOKENS[tokens.kinds[offset]].__name__,
+        )
+        raise tokens.error(offset, msg)
 
 
-def matches_pattern(
-    tokens, offset, pattern,
-    cb=lambda tokens, offset, pattern: None,
-):
-    """Basically a regex language for tokens
+def _compile_leaf(cls):
+    kind = KIND[cls]
 
-    `cb` is called on failure and should raise or return `None`
-    """
-    start = offset
-
-    if isinstance(pattern, Pattern):
-        for seq in pattern.sequence:
-            ret = matches_pattern(tokens, offset, seq)
-            if ret is None:
-                return cb(tokens, offset, seq)
-            else:
-                _, offset, _ = ret
-        return Match(start, offset, tokens)
+    def match(kinds, offset):
+        return offset + 1 if kinds[offset] == kind else -1
+    return Matcher(cls, match, frozenset((kind,)), False)
+
+
+def _compile_or(pattern, choices):
+    first = frozenset().union(*(choice.first for choice in choices))
+    nullable = any(choice.nullable for choice in choices)
+    if all(isinstance(choice.pattern, type) for choice in choices):
+        def match(kinds, offset):
+            return offset + 1 if kinds[offset] in first else -1
+    else:
+        # Only try the choices which can match the next kind (in order)
+        table = {
+            kind: tuple(
+                choice.match for choice in choices
+                if kind in choice.first or choice.nullable
+            )
+            for kind in first
+        }
+        default = tuple(
+            choice.match for choice in choices if choice.nullable
+        )
+
+        def match(kinds, offset):
+            for choice in table.get(kinds[offset], default):
+                end = choice(kinds, offset)
+                if end >= 0:
+                    return end
+            return -1
+    return Matcher(pattern, match, first, nullable)
+
+
+def _compile_sequence(pattern, parts):
+    first = set()
+    for part in parts:
+        first.update(part.first)
+        if not part.nullable:
+            break
+    first = frozenset(first)
+    nullable = all(part.nullable for part in parts)
+    part_matches = tuple(part.match for part in parts)
+
+    def match(kinds, offset):
+        if not nullable and kinds[offset] not in first:
+            return -1
+        for part in part_matches:
+            offset = part(kinds, offset)
+            if offset < 0:
+                return -1
+        return offset
+    return Matcher(pattern, match, first, nullable, parts)
+
+
+def _compile_star(pattern, inner):
+    inner_match = inner.match
+
+    def match(kinds, offset):
+        while True:
+            end = inner_match(kinds, offset)
+            if end <= offset:
+                return offset
+            offset = end
+    return Matcher(pattern, match, inner.first, True)
+
+
+def compile_pattern(pattern):
+    """Compile a pattern (which may contain `Matcher`s) to a `Matcher`"""
+    if isinstance(pattern, Matcher):
+        return pattern
+    elif isinstance(pattern, Pattern):
+        parts = tuple(compile_pattern(part) for part in pattern.sequence)
+        raw = Pattern(*(part.pattern for part in parts))
+        return _compile_sequence(raw, parts)
     elif isinstance(pattern, Or):
-        for choice in pattern.choices:
-            ret = matches_pattern(tokens, offset, choice)
-            if ret is not None:
-                return ret
-        else:
-            return cb(tokens, offset, pattern)
+        choices = tuple(compile_pattern(choice) for choice in pattern.choices)
+        raw = Or(*(choice.pattern for choice in choices))
+        return _compile_or(raw, choices)
     elif isinstance(pattern, Star):
-        while True:
-            ret = matches_pattern(tokens, offset, pattern.pattern)
-            if ret is None:
-                break
-            else:
-                _, offset, _ = ret
-        return Match(start, offset, tokens)
-    elif isinstance(tokens[offset], pattern):
-        return Match(start, offset + 1, tokens)
+        inner = compile_pattern(pattern.pattern)
+        return _compile_star(Star(inner.pattern), inner)
     else:
-        return cb(tokens, offset, pattern)
-
-
-def get_pattern(tokens, offset, pattern, single=False):
-    match = matches_pattern(tokens, offset, pattern, pattern_expected)
-    val, offset = match.match()
-    if single:
-        val, = val
-    return val, offset
+        return _compile_leaf(pattern)
@@ -2,6 +2,9 @@ from __future__ import absolute_import
 from __future__ import unicode_literals
 
 import collections
+import operator
+
+from dumbconf import _primitive
 
 
 _ast_cls = collections.namedtuple
@@ -35,12 +38,68 @@ MapStart = _ast_cls('MapStart', ('src',))
 MapEnd = _ast_cls('MapEnd', ('src',))
 MapItem = _ast_cls('MapItem', ('head', 'key', 'inner', 'val', 'tail'))
 
-Bool = _ast_cls('Bool', ('val', 'src'))
-Null = _ast_cls('Null', ('val', 'src'))
-Int = _ast_cls('Int', ('val', 'src'))
-Float = _ast_cls('Float', ('val', 'src'))
-String = _ast_cls('String', ('val', 'src'))
-BareWordKey = _ast_cls('BareWordKey', ('val', 'src'))
+_UNDECODED = object()
+
+
+def _primitive_cls(name, parse):
+    base = _ast_cls(name, ('val', 'src'))
+
+    class cls(base):
+        """`val` may be left undecoded, it is then decoded on each access"""
+        __slots__ = ()
+
+        @classmethod
+        def from_src(cls, src):
+            return tuple.__new__(cls, (_UNDECODED, src))
+
+        @property
+        def val(self):
+            val = tuple.__getitem__(self, 0)
+            if val is _UNDECODED:
+                val = parse(self.src)
+            return val
+
+        # Before python 3.8 the fields' properties index the instance, which
+        # goes through `val` (and so back to `src`)
+        src = property(lambda self: tuple.__getitem__(self, 1))
+
+        def __iter__(self):
+            return iter((self.val, self.src))
+
+        def __getitem__(self, key):
+            return tuple(self)[key]
+
+        def __contains__(self, item):
+            return item in tuple(self)
+
+        def __eq__(self, other):
+            return tuple(self) == other
+
+        def __ne__(self, other):
+            return not self == other
+
+        def __hash__(self):
+            return hash(tuple(self))
+
+        def __repr__(self):
+            return '{}(val={!r}, src={!r})'.format(name, self.val, self.src)
+
+    for op in (operator.lt, operator.le, operator.gt, operator.ge):
+        setattr(
+            cls, '__{}__'.format(op.__name__),
+            lambda self, other, op=op: op(tuple(self), other),
+        )
+    cls.__name__ = cls.__qualname__ = str(name)
+    cls.parse = staticmethod(parse)
+    return cls
+
+
+Bool = _primitive_cls('Bool', _primitive.Bool.parse)
+Null = _primitive_cls('Null', _primitive.Null.parse)
+Int = _primitive_cls('Int', _primitive.Int.parse)
+Float = _primitive_cls('Float', _primitive.Float.parse)
+String = _primitive_cls('String', _primitive.String.parse)
+BareWordKey = _primitive_cls('BareWordKey', _primitive.BareWord.parse)
 
 Colon = _ast_cls('Colon', ('src',))
 Comma = _ast_cls('Comma', ('src',))
@@ -53,3 +112,67 @@ EOF = _ast_cls('EOF', ('src',))
 
 AST = _namesort(v for v in vars().values() if isinstance(v, type))
 PRIMITIVE = _namesort(v for v in AST if v._fields == ('val', 'src'))
+TOKENS = _namesort(v for v in AST if 'src' in v._fields)
+
+
+def _lazy_cls(base):
+    class cls(base):
+        """A container which is only parsed once it is looked into.
+
+        `lazy(parse, source)` creates it, unparsing to `source()` until parsed.
+        """
+
+        @classmethod
+        def lazy(cls, parse, source):
+            ret = tuple.__new__(cls, (_UNDECODED,) * len(base._fields))
+            ret.__dict__.update(parse=parse, source=source)
+            return ret
+
+        @property
+        def is_parsed(self):
+            return (
+                tuple.__getitem__(self, 0) is not _UNDECODED or
+                'fields' in self.__dict__
+            )
+
+        def _values(self):
+            if tuple.__getitem__(self, 0) is not _UNDECODED:
+                return tuple(tuple.__iter__(self))
+            try:
+                return self.__dict__['fields']
+            except KeyError:
+                fields = tuple(tuple.__iter__(self.__dict__['parse']()))
+                self.__dict__['fields'] = fields
+                del self.__dict__['parse'], self.__dict__['source']
+                return fields
+
+        def __iter__(self):
+            return iter(self._values())
+
+        def __getitem__(self, key):
+            return self._values()[key]
+
+        def __eq__(self, other):
+            return self._values() == other
+
+        def __ne__(self, other):
+            return not self == other
+
+        def __hash__(self):
+            return hash(self._values())
+
+        def __repr__(self):
+            return repr(base._make(self._values()))
+
+        def __reduce__(self):
+            return base, self._values()
+
+    for i, field in enumerate(base._fields):
+        setattr(cls, field, property(lambda self, i=i: self._values()[i]))
+    cls.__name__ = cls.__qualname__ = str(base.__name__)
+    return cls
+
+
+# Lists / maps skipped by a lazy parse, see `_parse`
+LazyList = _lazy_cls(List)
+LazyMap = _lazy_cls(Map)
@@ -0,0 +1,57 @@
+"""Compare the memory used by a roundtrip ast with shared (flyweight) trivia
+/ punctuation tokens against one with a token per occurrence.
+
+Usage (python 3): python testing/bench_memory.py [--size N]
+"""
+import argparse
+import tracemalloc
+
+from bench_tokenize import ENTRY
+from dumbconf import ast
+from dumbconf._parse import parse_from_tokens
+from dumbconf._tokenize import tokenize_packed
+from dumbconf._tokenize import TokenStream
+
+
+# kind -> function creating a new token per occurrence
+UNSHARED_MAKE_TOKEN = tuple(
+    tp.from_src if tp in ast.PRIMITIVE else tp for tp in ast.TOKENS
+)
+
+
+class UnsharedTokenStream(TokenStream):
+    __slots__ = ()
+
+    def _token(self, i):
+        return UNSHARED_MAKE_TOKEN[self.kinds[i]](self.text(i))
+
+
+def _parse_memory(tokens):
+    tracemalloc.start()
+    ret = parse_from_tokens(tokens)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return ret, size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    src = ''.join(ENTRY.format(i) for i in range(args.size))
+    tokens = tokenize_packed(src)
+    unshared = UnsharedTokenStream(
+        tokens.src, tokens.kinds, tokens.starts, tokens.ends,
+    )
+    print('{} bytes, {} tokens'.format(len(src), len(tokens)))
+
+    shared_doc, shared_size = _parse_memory(tokens)
+    unshared_doc, unshared_size = _parse_memory(unshared)
+    assert shared_doc == unshared_doc
+    for name, size in (('unshared', unshared_size), ('shared', shared_size)):
+        print('{:<10}{:>8.2f}MiB'.format(name, size / 2 ** 20))
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,44 @@
+"""Compare the primitive decoders against `ast.literal_eval`.
+
+Usage (python 3): python testing/bench_primitive.py [--number N]
+"""
+import argparse
+import ast
+import timeit
+
+from dumbconf import _primitive
+
+
+def _literal_eval_str(s):
+    return ast.literal_eval('u' + s)
+
+
+CASES = (
+    (_primitive.Bool, 'true', lambda s: ast.literal_eval(s.capitalize())),
+    (_primitive.Int, '1234', ast.literal_eval),
+    (_primitive.Int, '0xDEADBEEF', ast.literal_eval),
+    (_primitive.Float, '6.02e23', ast.literal_eval),
+    (_primitive.String, "'plain string'", _literal_eval_str),
+    (_primitive.String, "'esc\\u2603\\n'", _literal_eval_str),
+)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--number', type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    print('{:<10}{:<18}{:>12}{:>12}'.format('type', 'src', 'literal', 'fast'))
+    for tp, s, literal_eval in CASES:
+        assert tp.parse(s) == literal_eval(s)
+        times = [
+            timeit.timeit(lambda: func(s), number=args.number) / args.number
+            for func in (literal_eval, tp.parse)
+        ]
+        print('{:<10}{:<18}{:>10.2f}us{:>10.2f}us'.format(
+            tp.__name__, s, *(t * 1e6 for t in times)
+        ))
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,74 @@
+"""Compare `tokenize` against the original regex-per-processor loop and
+the memory used by the tuple of tokens against a `TokenStream`.
+
+Usage (python 3): python testing/bench_tokenize.py [--repeat N] [--size N]
+"""
+import argparse
+import timeit
+import tracemalloc
+
+from dumbconf import ast
+from dumbconf._error import ParseError
+from dumbconf._tokenize import KIND
+from dumbconf._tokenize import MAKE_TOKEN
+from dumbconf._tokenize import tokenize
+from dumbconf._tokenize import tokenize_packed
+from dumbconf._tokenize import tokenize_processors
+
+
+ENTRY = (
+    "key_{0}: {{\n"
+    "    bools: [true, false],  # a comment\n"
+    "    ints: [0xDEADBEEF, 0b101010, 0o755, 0, {0}],\n"
+    "    floats: [1., 1e5, .142857, 6.02e23],\n"
+    "    strings: ['single', \"double\", 'escaped: \\u2603'],\n"
+    "    nothing: null,\n"
+    "}}\n"
+)
+
+
+def tokenize_loop(src, offset=0):
+    srclen = len(src)
+    tokens = []
+    while offset < srclen:
+        for reg, cls in tokenize_processors:
+            match = reg.match(src, offset)
+            if match:
+                tokens.append(MAKE_TOKEN[KIND[cls]](match.group()))
+                offset = match.end()
+                break
+        else:
+            raise ParseError(src, offset, 'Unexpected token')
+    tokens.append(ast.EOF(''))
+    return tuple(tokens)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--size', type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    src = ''.join(ENTRY.format(i) for i in range(args.size))
+    assert tokenize(src) == tokenize_loop(src)
+    print('{} bytes, {} tokens'.format(len(src), len(tokenize(src))))
+
+    funcs = (
+        ('loop', tokenize_loop),
+        ('master', tokenize),
+        ('packed', tokenize_packed),
+    )
+    for name, func in funcs:
+        best = min(timeit.repeat(
+            lambda: func(src), number=1, repeat=args.repeat,
+        ))
+        tracemalloc.start()
+        ret = func(src)
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del ret
+        print('{:<8}{:.4f}s {:>8.2f}MiB'.format(name, best, size / 2 ** 20))
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,143 @@
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import sys
+
+import pytest
+
+from dumbconf import ast
+from dumbconf._cache import Cache
+from dumbconf._cache import estimate_size
+from dumbconf._error import ParseError
+from dumbconf._lazy import FrozenList
+from dumbconf._lazy import FrozenMap
+from dumbconf._roundtrip import dumps_roundtrip
+from dumbconf._roundtrip import loads_roundtrip
+
+
+def test_estimate_size():
+    assert estimate_size('') == sys.getsizeof('')
+    shared = 'x' * 100
+    val = {'a': [shared, shared]}
+    assert estimate_size(val) == (
+        sys.getsizeof(val) + sys.getsizeof('a') +
+        sys.getsizeof(val['a']) + sys.getsizeof(shared)
+    )
+
+
+def test_estimate_size_does_not_decode():
+    # Decoding this would raise
+    token = ast.String.from_src("'\\x'")
+    assert estimate_size((token,)) > 0
+
+
+def test_cache_loads():
+    cache = Cache()
+    assert cache.loads('a: [1]\n') == {'a': [1]}
+    assert (cache.hits, cache.misses, len(cache)) == (0, 1, 1)
+    ret = cache.loads('a: [1]\n')
+    assert ret == {'a': [1]}
+    assert (cache.hits, cache.misses, len(cache)) == (1, 1, 1)
+    # Each is a copy
+    ret['a'].append(2)
+    assert cache.loads('a: [1]\n') == {'a': [1]}
+    assert cache.size > 0
+
+
+def test_cache_loads_frozen():
+    cache = Cache(frozen=True)
+    ret = cache.loads('a: [1]\n')
+    assert isinstance(ret, FrozenMap)
+    assert isinstance(ret['a'], FrozenList)
+    assert ret == {'a': [1]}
+    assert cache.loads('a: [1]\n') is ret
+    assert cache.hits == 1
+    assert cache.size > 0
+
+
+@pytest.mark.parametrize('frozen', (True, False))
+def test_cache_loads_null(frozen):
+    cache = Cache(frozen=frozen)
+    for _ in range(5):
+        assert cache.loads('null') is None
+    size = cache.size
+    assert (cache.hits, cache.misses, len(cache)) == (4, 1, 1)
+    cache.clear()
+    cache.loads('null')
+    assert cache.size == size
+
+
+def test_cache_replace_entry():
+    cache = Cache()
+    cache._put('k', 'a', 10)
+    cache._put('k', 'b', 20)
+    assert (len(cache), cache.size) == (1, 20)
+    cache._put('k', 'c', cache.max_size + 1)
+    assert (len(cache), cache.size) == (0, 0)
+
+
+def test_cache_loads_roundtrip():
+    cache = Cache()
+    proxy = cache.loads_roundtrip('a: 1\n')
+    proxy['a'] = 2
+    assert dumps_roundtrip(proxy) == 'a: 2\n'
+    # The cached ast is unchanged by the edit
+    other = cache.loads_roundtrip('a: 1\n')
+    assert dumps_roundtrip(other) == 'a: 1\n'
+    assert other is not proxy
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_loads_and_loads_roundtrip_separate():
+    cache = Cache()
+    assert cache.loads('a: 1\n') == {'a': 1}
+    assert cache.loads_roundtrip('a: 1\n').python_value() == {'a': 1}
+    assert (cache.hits, cache.misses, len(cache)) == (0, 2, 2)
+
+
+def test_cache_evicts_least_recently_used():
+    one = Cache()
+    one.loads('a: 1\n')
+    cache = Cache(max_size=one.size * 2)
+    cache.loads('a: 1\n')
+    cache.loads('b: 1\n')
+    cache.loads('a: 1\n')
+    cache.loads('c: 1\n')
+    assert (len(cache), cache.evictions) == (2, 1)
+    assert cache.size <= cache.max_size
+    cache.loads('a: 1\n')
+    cache.loads('b: 1\n')
+    assert (cache.hits, cache.misses, cache.evictions) == (2, 4, 2)
+
+
+def test_cache_too_large():
+    cache = Cache(max_size=1)
+    assert cache.loads('a: 1\n') == {'a': 1}
+    assert (len(cache), cache.size, cache.evictions) == (0, 0, 0)
+
+
+def test_cache_too_deeply_nested_to_copy():
+    cache = Cache()
+    src = '[' * 10000 + ']' * 10000
+    val = cache.loads(src)
+    for _ in range(9999):
+        val, = val
+    assert val == []
+    assert len(cache) == 0
+
+
+def test_cache_errors_are_not_cached():
+    cache = Cache()
+    for _ in range(2):
+        with pytest.raises(ParseError):
+            cache.loads('a: ')
+    assert (cache.hits, cache.misses, len(cache)) == (0, 2, 0)
+
+
+def test_cache_clear():
+    cache = Cache()
+    cache.loads('a: 1\n')
+    cache.clear()
+    assert (len(cache), cache.size) == (0, 0)
+    cache.loads('a: 1\n')
+    assert cache.misses == 2
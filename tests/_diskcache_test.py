@@ -0,0 +1,96 @@
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import collections
+import os
+import pickle
+
+from dumbconf import _diskcache
+from dumbconf._diskcache import cache_version
+from dumbconf._diskcache import entry_key
+from dumbconf._diskcache import entry_path
+from dumbconf._diskcache import MISSING
+from dumbconf._diskcache import read
+from dumbconf._diskcache import write
+
+
+def test_cache_version():
+    assert cache_version()[0] == _diskcache._FORMAT
+    assert cache_version() is cache_version()
+
+
+def test_entry_path(tmpdir):
+    cache_dir = tmpdir.join('cache').strpath
+    path = tmpdir.join('f.dumb').strpath
+    assert os.path.dirname(entry_path(cache_dir, path)) == cache_dir
+    assert entry_path(cache_dir, path) != entry_path(cache_dir, path + 'x')
+
+
+def test_entry_key(tmpdir):
+    path = tmpdir.join('f.dumb')
+    path.write_binary(b'a: 1\n')
+    stat = os.stat(path.strpath)
+    key = entry_key(stat, b'a: 1\n')
+    assert key[:3] == (cache_version(), stat.st_mtime, 5)
+    assert key != entry_key(stat, b'a: 2\n')
+
+
+def test_read_write(tmpdir):
+    path = tmpdir.join('cache', 'entry').strpath
+    assert read(path, 'key') is MISSING
+    write(path, 'key', {'a': 1})
+    assert read(path, 'key') == {'a': 1}
+    assert read(path, 'other') is MISSING
+    write(path, 'other', [])
+    assert read(path, 'other') == []
+    assert os.listdir(os.path.dirname(path)) == ['entry']
+
+
+def test_read_write_ordered_dict(tmpdir):
+    path = tmpdir.join('entry').strpath
+    val = collections.OrderedDict((('b', [1, None]), ('a', 2.5)))
+    write(path, 'key', val)
+    ret = read(path, 'key')
+    assert type(ret) is collections.OrderedDict
+    assert list(ret.items()) == list(val.items())
+
+
+class _MakeDir(object):
+    def __init__(self, path):
+        self.path = path
+
+    def __reduce__(self):
+        return os.mkdir, (self.path,)
+
+
+def test_read_does_not_run_code(tmpdir):
+    made = tmpdir.join('made').strpath
+    path = tmpdir.join('entry')
+    for key, value in (('key', _MakeDir(made)), (_MakeDir(made), 1)):
+        path.write_binary(pickle.dumps(key) + pickle.dumps(value))
+        assert read(path.strpath, 'key') is MISSING
+    assert not os.path.exists(made)
+
+
+def test_read_corrupt(tmpdir):
+    path = tmpdir.join('entry')
+    path.write_binary(b'\x80\x04garbage')
+    assert read(path.strpath, 'key') is MISSING
+
+
+def test_write_cache_dir_not_a_directory(tmpdir):
+    tmpdir.join('cache').write_binary(b'')
+    path = tmpdir.join('cache', 'entry').strpath
+    write(path, 'key', 1)
+    assert read(path, 'key') is MISSING
+
+
+def test_write_too_deeply_nested(tmpdir):
+    val = ret = []
+    for _ in range(100000):
+        val.append([])
+        val = val[0]
+    path = tmpdir.join('entry').strpath
+    write(path, 'key', ret)
+    assert read(path, 'key') is MISSING
+    assert tmpdir.listdir() == []
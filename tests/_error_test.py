@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+import pickle
+
+from dumbconf._error import index_lines
 from dumbconf._error import ParseError
 
 
@@ -69,3 +72,107 @@ def test_parse_error_many_lines():
         '5   |e\n'
         '6   |f\n'
     )
+
+
+def test_parse_error_window():
+    assert str(ParseError('b\nc\nd\n', 2, src_line=5, src_col=3)) == (
+        '\n\n'
+        'Line 6, column 1\n'
+        '\n'
+        'Line|Source\n'
+        '----|------------------------------------------------------\n'
+        '5   |b\n'
+        '6   |c\n'
+        '     ^\n'
+        '7   |d\n'
+    )
+
+
+def test_parse_error_window_first_line():
+    assert str(ParseError('bc\n', 1, src_line=5, src_col=3)) == (
+        '\n\n'
+        'Line 5, column 4\n'
+        '\n'
+        'Line|Source\n'
+        '----|------------------------------------------------------\n'
+        '5   |bc\n'
+        '      ^\n'
+    )
+
+
+def test_parse_error_window_offset():
+    error = ParseError('bc\n', 1, src_line=5, src_col=3, src_offset=20)
+    assert (error.offset, error.line, error.col) == (21, 5, 4)
+
+
+def test_parse_error_end_of_file_after_newline():
+    assert str(ParseError('foo\n', 4)) == (
+        '\n\n'
+        'Line 1, column 4\n'
+        '\n'
+        'Line|Source\n'
+        '----|------------------------------------------------------\n'
+        '1   |foo\n'
+        '        ^\n'
+    )
+
+
+def test_parse_error_end_of_file_without_newline():
+    # The column is that of the end of the file, as on the first line (before
+    # locating errors by line index, later lines were one column short)
+    assert str(ParseError('\n{a', 3)) == (
+        '\n\n'
+        'Line 2, column 3\n'
+        '\n'
+        'Line|Source\n'
+        '----|------------------------------------------------------\n'
+        '1   |\n'
+        '2   |{a\n'
+        '       ^\n'
+    )
+    assert str(ParseError('{a', 2)).startswith('\n\nLine 1, column 3\n')
+
+
+def test_parse_error_bytes():
+    src = 'a\n☃☃b\n'.encode('UTF-8')
+    error = ParseError(src, src.index(b'b'))
+    expected = vars(ParseError('a\n☃☃b\n', 4))
+    assert dict(vars(error), offset=4) == expected
+    assert (error.line, error.col) == (2, 3)
+
+
+def test_parse_error_line_starts():
+    src = 'a\nb\nc\n'
+    error = ParseError(src, 2, line_starts=index_lines(src))
+    assert str(error) == str(ParseError(src, 2))
+
+
+def test_parse_error_keeps_only_excerpt():
+    src = ''.join('line {}\n'.format(i) for i in range(1000))
+    error = ParseError(src, src.index('line 500'))
+    assert error.excerpt == tuple(
+        (i + 1, 'line {}'.format(i)) for i in range(498, 503)
+    )
+    assert not any(v is src for v in vars(error).values())
+
+
+def test_parse_error_long_line():
+    src = 'x' * 1000 + 'y' + 'x' * 1000 + '\n' + 'z' * 1000
+    error = ParseError(src, 1000)
+    assert (error.line, error.col) == (1, 1001)
+    (_, line_src), (_, next_src) = error.excerpt
+    assert len(line_src) == 160
+    assert line_src[error.caret - 1] == 'y'
+    # the same columns of the other lines are shown
+    assert next_src == 'z' * 80
+
+
+def test_parse_error_pickle():
+    src = 'a: 1\n' * 1000 + 'b'
+    error = ParseError(src, len(src) - 1, 'Error!')
+    ret = pickle.loads(pickle.dumps(error))
+    assert type(ret) is ParseError
+    assert str(ret) == str(error)
+    assert ret.args == error.args == ('Error!',)
+    # Only what the error kept is pickled, not the source
+    assert len(pickle.dumps(error)) < 1000
@@ -0,0 +1,72 @@
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import collections
+
+import pytest
+
+from dumbconf._lazy import freeze
+from dumbconf._lazy import FrozenList
+from dumbconf._lazy import FrozenMap
+from dumbconf._lazy import LazyList
+from dumbconf._lazy import LazyMap
+
+
+def test_lazy_map():
+    calls = []
+
+    def parse():
+        calls.append(1)
+        return collections.OrderedDict((('a', 1), ('b', 2)))
+    val = LazyMap(parse)
+    assert not val.is_parsed
+    assert val['a'] == 1
+    assert val.is_parsed
+    assert list(val) == ['a', 'b']
+    assert len(val) == 2
+    assert val.get('c') is None
+    assert val == {'a': 1, 'b': 2}
+    expected = collections.OrderedDict((('a', 1), ('b', 2)))
+    assert repr(val) == 'LazyMap({!r})'.format(expected)
+    assert calls == [1]
+
+
+def test_lazy_list():
+    val = LazyList(lambda: [1, 2])
+    assert val[1] == 2
+    assert list(val) == [1, 2]
+    assert len(val) == 2
+    assert val == [1, 2]
+    assert [1, 2] == val
+    assert val == LazyList(lambda: [1, 2])
+    assert val != [1]
+    assert repr(val) == 'LazyList([1, 2])'
+
+
+def test_freeze():
+    val = collections.OrderedDict((('a', [1, {'b': []}]), ('c', 2)))
+    ret = freeze(val)
+    assert isinstance(ret, FrozenMap)
+    assert ret == {'a': [1, {'b': []}], 'c': 2}
+    assert list(ret) == ['a', 'c']
+    assert isinstance(ret['a'], FrozenList)
+    assert isinstance(ret['a'][1], FrozenMap)
+    assert isinstance(ret['a'][1]['b'], FrozenList)
+    assert repr(ret['a'][1]['b']) == 'FrozenList([])'
+    with pytest.raises(TypeError):
+        ret['a'][0] = 2
+
+
+def test_freeze_primitive():
+    assert freeze(1) == 1
+
+
+def test_freeze_deeply_nested():
+    val = ret = []
+    for _ in range(10000):
+        val.append([])
+        val = val[0]
+    ret = freeze(ret)
+    for _ in range(10000):
+        ret = ret[0]
+    assert isinstance(ret, FrozenList)
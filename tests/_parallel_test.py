@@ -0,0 +1,150 @@
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import pytest
+
+from dumbconf import _parallel
+from dumbconf import ast
+from dumbconf._error import ParseError
+from dumbconf._parallel import parse_piece
+from dumbconf._parallel import split_top_level
+from dumbconf._parse import parse
+from dumbconf._parse import parse_top_level_items
+from dumbconf._parse import top_level_items_from_layout
+from dumbconf._parse import top_level_items_layout
+from dumbconf._roundtrip import dumps_roundtrip
+from dumbconf._roundtrip import loads
+from dumbconf._roundtrip import loads_roundtrip
+from dumbconf._tokenize import tokenize_packed
+
+
+@pytest.fixture
+def small_pieces(monkeypatch):
+    monkeypatch.setattr(_parallel, '_MIN_PIECE', 1)
+
+
+def _pieces(src, pieces):
+    bounds = split_top_level(src, pieces)
+    return [src[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+def test_split_top_level():
+    src = 'a: 1\nb: 2\nc: 3\nd: 4\n'
+    assert _pieces(src, 2) == ['a: 1\nb: 2\n', 'c: 3\nd: 4\n']
+    assert _pieces(src, 4) == ['a: 1\n', 'b: 2\n', 'c: 3\n', 'd: 4\n']
+    assert _pieces(src, 8) == ['a: 1\n', 'b: 2\n', 'c: 3\n', 'd: 4\n']
+
+
+def test_split_top_level_keeps_head_with_item():
+    src = 'a: [\n    1,\n]\n\n# b\n    # b\nb: 2\n'
+    assert _pieces(src, 2) == ['a: [\n    1,\n]\n', '\n# b\n    # b\nb: 2\n']
+
+
+def test_split_top_level_nothing_to_split():
+    assert _pieces('a: 1\n', 4) == ['a: 1\n']
+    assert _pieces('# a\n# b\na: 1\n', 4) == ['# a\n# b\na: 1\n']
+    assert _pieces('[\n    1,\n]\n', 4) == ['[\n    1,\n]\n']
+
+
+def test_parse_piece():
+    assert parse_piece(('a: 1\n', True, True)) == {'a': 1}
+    assert parse_piece(('    # c\nb: 2', False, True)) == {'b': 2}
+    kinds, _, _, layout = parse_piece(('# c\na: 1\n', True, False))
+    assert [ast.TOKENS[kind] for kind in kinds] == [
+        ast.Comment, ast.BareWordKey, ast.Colon, ast.Space, ast.Int, ast.NL,
+        ast.EOF,
+    ]
+    assert list(layout) == [1, 0, 2, 1]
+
+
+@pytest.mark.parametrize(
+    'src',
+    (
+        'a: 1\n',
+        '# head\n\na: 1  # a\n\n# b\nb: [\n    1, 2,\n]\nc: {d: 4}\n# tail\n',
+    ),
+)
+def test_top_level_items_from_layout(src):
+    tokens = tokenize_packed(src)
+    head, items = parse_top_level_items(tokens)
+    layout = top_level_items_layout(head, items)
+    assert top_level_items_from_layout(tokens, layout) == (head, items)
+
+
+def test_parse_piece_invalid():
+    assert parse_piece(('a: [\n', True, True)) is None
+    assert parse_piece(('1,\n]\n', False, False)) is None
+
+
+PARALLEL_SRCS = (
+    'a: 1\nb: 2\nc: 3\nd: 4\n',
+    '# head\n\na: 1  # a\n\n# b\nb: [\n    1, 2,\n]\n# c\nc: {\n    d: 4,\n}\n'
+    'e: "e"\n# tail\n',
+    'a: 1\nb: 2\na: 3\nc: 4\n',
+    # Lines which look like items in multiline containers
+    'a: {\nb: 1,\n}\nc: [\n1,\n]\nd: 2\n',
+    '{\na: 1,\nb: 2,\n}\n',
+    # invalid
+    'a: 1\nb: 2\nc: 3\nd 4\n', 'a: {\nb: 1\n}\nc: 2\n', 'a: 1\nb: 2\n[',
+)
+
+
+def _error(func, *args, **kwargs):
+    with pytest.raises(ParseError) as excinfo:
+        func(*args, **kwargs)
+    return str(excinfo.value)
+
+
+@pytest.mark.usefixtures('small_pieces')
+@pytest.mark.parametrize('src', PARALLEL_SRCS)
+def test_loads_workers(src):
+    try:
+        expected = loads(src)
+    except ParseError:
+        assert _error(loads, src, workers=2) == _error(loads, src)
+    else:
+        ret = loads(src, workers=2)
+        assert ret == expected
+        assert list(ret) == list(expected)
+
+
+@pytest.mark.usefixtures('small_pieces')
+@pytest.mark.parametrize('src', PARALLEL_SRCS)
+def test_loads_roundtrip_workers(src):
+    try:
+        expected = parse(src)
+    except ParseError:
+        assert (
+            _error(loads_roundtrip, src, workers=2) ==
+            _error(loads_roundtrip, src)
+        )
+    else:
+        proxy = loads_roundtrip(src, workers=2)
+        assert proxy._ast_obj == expected
+        assert dumps_roundtrip(proxy) == src
+
+
+@pytest.mark.usefixtures('small_pieces')
+def test_loads_roundtrip_workers_edit():
+    proxy = loads_roundtrip('a: 1\nb: {\n    c: 2,\n}\n', workers=2)
+    # The pieces' items are rebuilt lazily
+    assert isinstance(proxy._ast_obj.val.items[1].val, ast.LazyMap)
+    assert proxy.python_value() == {'a': 1, 'b': {'c': 2}}
+    proxy['b']['c'] = 3
+    assert dumps_roundtrip(proxy) == 'a: 1\nb: {\n    c: 3,\n}\n'
+
+
+def test_loads_workers_small_document(monkeypatch):
+    def pool(workers):
+        raise AssertionError('unreachable')
+    monkeypatch.setattr(_parallel.multiprocessing, 'Pool', pool)
+    assert loads('a: 1\nb: 2\n', workers=2) == {'a': 1, 'b': 2}
+    assert loads('a: 1\nb: 2\n', workers=1) == {'a': 1, 'b': 2}
+
+
+def test_workers_and_lazy():
+    with pytest.raises(TypeError) as excinfo:
+        loads('a: 1\n', lazy=True, workers=2)
+    assert excinfo.value.args == (
+        '`lazy` and `workers` cannot be used together.',
+    )
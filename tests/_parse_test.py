@@ -1,13 +1,24 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+import collections
+import io
+import itertools
+
 import pytest
 
+from dumbconf import _parse
 from dumbconf import ast
 from dumbconf._error import ParseError
 from dumbconf._parse import debug
+from dumbconf._parse import Event
+from dumbconf._parse import iter_events
 from dumbconf._parse import parse as parse_actual
+from dumbconf._parse import Spans
 from dumbconf._parse import unparse
+from dumbconf._parse import unparse_to
+from dumbconf._parse import value_from_tokens
+from dumbconf._tokenize import tokenize_packed
 
 
 EXPECT_VAL = (
@@ -698,3 +709,266 @@ def test_parse_error_token_expected():
         '1   |{True:,}\n'
         '           ^\n',
     )
+
+
+def test_deeply_nested():
+    depth = 10000
+    ret = parse('[' * depth + '{k: true}' + ']' * depth)
+    val = ret.val
+    for _ in range(depth - 1):
+        val, = val.items
+        val = val.val
+    assert isinstance(val.items[0].val, ast.Map)
+
+
+def test_debug_deeply_nested():
+    # the output grows with the square of the depth, keep it modest
+    depth = 1000
+    ret = debug(parse_actual('[' * depth + ']' * depth))
+    assert ret.count('List(\n') == depth
+    assert ret.endswith('    tail=(),\n)')
+
+
+def test_unparse_to():
+    src = '# head\na: [1, {b: "x"}]  # c\n'
+    stream = io.StringIO()
+    unparse_to(parse(src), stream)
+    assert stream.getvalue() == src
+
+
+def test_unparse_to_writes_in_chunks(monkeypatch):
+    monkeypatch.setattr(_parse, '_WRITE_CHUNK', 10)
+    src = ''.join('k{}: [1, 2]\n'.format(i) for i in range(10))
+    writes = []
+    unparse_to(parse(src), collections.namedtuple('W', 'write')(writes.append))
+    assert ''.join(writes) == src
+    assert len(writes) > 5
+    assert all(len(chunk) < 20 for chunk in writes)
+
+
+def test_parse_error_deeply_nested():
+    depth = 10000
+    with pytest.raises(ParseError) as excinfo:
+        parse('{k: ' * depth + '}' * depth)
+    assert str(excinfo.value).startswith(EXPECT_VAL + 'but received MapEnd')
+
+
+def test_iter_events():
+    src = '# hi\na: [1, {b: 2}]  # c\nc: true\n'
+    assert tuple(iter_events(src, comments=True)) == (
+        Event('comment', '# hi', 0, 5),
+        Event('start_map', None, 5, 5),
+        Event('key', 'a', 5, 6),
+        Event('start_list', None, 8, 9),
+        Event('scalar', 1, 9, 10),
+        Event('start_map', None, 12, 13),
+        Event('key', 'b', 13, 14),
+        Event('scalar', 2, 16, 17),
+        Event('end_map', None, 17, 18),
+        Event('end_list', None, 18, 19),
+        Event('comment', '# c', 21, 25),
+        Event('key', 'c', 25, 26),
+        Event('scalar', True, 28, 32),
+        Event('end_map', None, 33, 33),
+    )
+
+
+def test_iter_events_no_comments():
+    events = tuple(iter_events('[\n    # comment\n    1,\n]'))
+    assert events == (
+        Event('start_list', None, 0, 1),
+        Event('scalar', 1, 20, 21),
+        Event('end_list', None, 23, 24),
+    )
+
+
+EVENTS_SRCS = (
+    'true', '[]', '{}', '[\n    # comment\n]',
+    '# head\n\n{a: [1, 2.5, "s"], b: {c: null}}  # tail\n',
+    '[\n    1, 2,\n    # comment\n    [3, {\n        d: 4,\n    }],\n]',
+    'a: 1\nb: [true]  # comment\n\n# comment\nc: {}\n',
+    # invalid
+    '', '[', '[1,2]', '{a: 1,}', '[\n    1\n]', 'a: 1\nb 2', '[1] 2',
+    '{[]: 1}', '[1, 2', '[]]', '[\n    1,\n    2,\n    3\n]', '[&]',
+    '[' + '1, ' * 100 + '1 2]', '[\n' + '    1,\n' * 50 + '    1 2,\n]',
+    'a: 1\n' * 50 + 'b 2', 'a: 1\nb: 2\nc: [1 2]\n',
+)
+
+
+def _value_from_events(events):
+    stack = [[]]
+    keys = []
+    for event in events:
+        if event.type == 'start_list':
+            stack.append([])
+        elif event.type == 'start_map':
+            stack.append(collections.OrderedDict())
+        elif event.type == 'key':
+            keys.append(event.value)
+        else:
+            if event.type == 'scalar':
+                val = event.value
+            else:
+                val = stack.pop()
+            if isinstance(stack[-1], list):
+                stack[-1].append(val)
+            else:
+                stack[-1][keys.pop()] = val
+    val, = stack[0]
+    return val
+
+
+def _result(func):
+    try:
+        return func()
+    except ParseError as e:
+        return (e.msg, e.offset, e.line, e.col)
+
+
+@pytest.mark.parametrize('src', EVENTS_SRCS)
+def test_iter_events_same_as_parse(src):
+    def from_events():
+        return _value_from_events(iter_events(src))
+
+    def from_tokens():
+        return value_from_tokens(tokenize_packed(src))
+    assert _result(from_events) == _result(from_tokens)
+
+
+@pytest.mark.parametrize('src', EVENTS_SRCS)
+def test_iter_events_stream(src):
+    def chunked():
+        return tuple(iter_events(
+            src[i:i + 3] for i in range(0, len(src), 3)
+        ))
+
+    def stream():
+        return tuple(iter_events(io.StringIO(src)))
+    assert _result(chunked) == _result(stream)
+    assert _result(chunked) == _result(lambda: tuple(iter_events(src)))
+
+
+def test_iter_events_is_lazy():
+    def chunks():
+        yield '['
+        while True:
+            yield '1, '
+    events = tuple(itertools.islice(iter_events(chunks()), 3))
+    assert events == (
+        Event('start_list', None, 0, 1),
+        Event('scalar', 1, 1, 2),
+        Event('scalar', 1, 4, 5),
+    )
+
+
+def test_iter_events_deeply_nested():
+    depth = 10000
+    events = tuple(iter_events('[' * depth + ']' * depth))
+    assert len(events) == 2 * depth
+
+
+LAZY_SRC = (
+    '# head\n'
+    'a: [1, {b: [2, 3]}]  # comment\n'
+    'c: {\n'
+    '    d: [\n'
+    '        4,\n'
+    '    ],\n'
+    '}\n'
+)
+
+
+def test_parse_lazy_same_as_parse():
+    ret = parse_actual(LAZY_SRC, lazy=True)
+    assert ret == parse_actual(LAZY_SRC)
+    assert debug(ret) == debug(parse_actual(LAZY_SRC))
+
+
+def test_parse_lazy_parses_on_access():
+    ret = parse_actual(LAZY_SRC, lazy=True)
+    a, c = ret.val.items
+    assert isinstance(a.val, ast.LazyList)
+    assert not a.val.is_parsed
+    assert a.val.items[0].val == ast.Int(1, '1')
+    assert a.val.is_parsed
+    # only one level is parsed at a time
+    assert not a.val.items[1].val.is_parsed
+    assert not c.val.is_parsed
+
+
+def test_parse_lazy_unparse_without_parsing():
+    ret = parse_actual(LAZY_SRC, lazy=True)
+    assert unparse(ret) == LAZY_SRC
+    assert not any(item.val.is_parsed for item in ret.val.items)
+
+
+def test_parse_lazy_error_on_access():
+    src = '{a: [1 2], b: 3}'
+    ret = parse_actual(src, lazy=True)
+    with pytest.raises(ParseError) as excinfo:
+        ret.val.items[0].val.items
+    with pytest.raises(ParseError) as excinfo_eager:
+        parse_actual(src)
+    assert excinfo.value.offset == excinfo_eager.value.offset == 6
+    assert str(excinfo.value) == str(excinfo_eager.value)
+
+
+@pytest.mark.parametrize('src', ('{a: [1}', '[[1, 2]', '[1, [2, {]]'))
+def test_parse_lazy_unmatched_brackets(src):
+    with pytest.raises(ParseError) as excinfo:
+        parse_actual(src, lazy=True)
+    with pytest.raises(ParseError) as excinfo_eager:
+        parse_actual(src)
+    assert str(excinfo.value) == str(excinfo_eager.value)
+
+
+SPANS_SRC = '# head\na: [1, {b: "x"}]  # c\n\nc: 2\n'
+
+
+def _source(spans, node):
+    start, end = spans[node]
+    return SPANS_SRC[start:end]
+
+
+def test_spans():
+    doc = parse(SPANS_SRC)
+    spans = Spans(doc)
+    assert spans[doc] == (0, len(SPANS_SRC))
+    top = doc.val
+    assert _source(spans, top) == SPANS_SRC[len('# head\n'):]
+    a, c = top.items
+    assert _source(spans, a) == 'a: [1, {b: "x"}]  # c\n'
+    assert _source(spans, c) == '\nc: 2\n'
+    assert _source(spans, a.key) == 'a'
+    assert _source(spans, a.val) == '[1, {b: "x"}]'
+    one, b_map = a.val.items
+    assert _source(spans, one) == '1, '
+    assert _source(spans, one.val) == '1'
+    assert _source(spans, b_map.val) == '{b: "x"}'
+    assert _source(spans, b_map.val.items[0].val) == '"x"'
+    assert _source(spans, c.val) == '2'
+
+
+def test_spans_unknown_node():
+    spans = Spans(parse('a: 1\n'))
+    node = ast.Int(val=1, src='1')
+    with pytest.raises(KeyError) as excinfo:
+        spans[node]
+    assert excinfo.value.args == (node,)
+
+
+def test_spans_lazy():
+    doc = parse_actual(SPANS_SRC, lazy=True)
+    spans = Spans(doc)
+    b_map = doc.val.items[0].val.items[1].val
+    assert _source(spans, b_map) == '{b: "x"}'
+
+
+def test_spans_deeply_nested():
+    src = '[' * 10000 + ']' * 10000
+    doc = parse_actual(src)
+    spans = Spans(doc)
+    val = doc.val
+    for i in range(9999):
+        assert spans[val] == (i, len(src) - i)
+        val = val.items[0].val
@@ -1,6 +1,10 @@
+# -*- coding: utf-8 -*-
 from __future__ import absolute_import
 from __future__ import unicode_literals
 
+import ast
+import warnings
+
 import pytest
 
 from dumbconf import _primitive
@@ -18,3 +22,58 @@ from dumbconf import _primitive
 def test_roundtrip(v, tp, expected):
     assert tp.parse(tp.dump(v)) == v
     assert tp.dump(v) == expected
+
+
+# The original `ast.literal_eval` based decoders
+LITERAL_EVAL_PARSE = {
+    _primitive.Bool: lambda s: ast.literal_eval(s.lower().capitalize()),
+    _primitive.Float: ast.literal_eval,
+    _primitive.Int: ast.literal_eval,
+    _primitive.String: lambda s: ast.literal_eval('u' + s),
+}
+
+
+def _result(func, s):
+    try:
+        with warnings.catch_warnings():
+            # both warn about invalid escape sequences
+            warnings.simplefilter('ignore')
+            ret = func(s)
+    except Exception as e:
+        return type(e)
+    else:
+        return type(ret), ret
+
+
+@pytest.mark.parametrize(
+    ('tp', 's'),
+    tuple((_primitive.Bool, s) for s in ('true', 'false', 'TRUE', 'yes')) +
+    tuple(
+        (_primitive.Int, s) for s in (
+            '0', '-0', '1234', '-5', '0x1F', '-0xdeadBEEF', '0b101', '-0b0',
+            '0o755', '0O17', '0X1f', '00', '+5', '--5', '1.5', '0x', '07',
+            '1_000', ' 1', '١', 'e5',
+        )
+    ) +
+    tuple(
+        (_primitive.Float, s) for s in (
+            '0e5', '1e-10', '0.', '.5', '1.5', '6.02E23', '-1.5e+3', '-.25',
+            '01e5', '1e999', '5', 'inf', 'nan', '1_0.5', ' 1.5', '1.5-2',
+            '0x1e5', '--1.5', 'e5',
+        )
+    ) +
+    tuple(
+        (_primitive.String, s) for s in (
+            "''", '""', "'foo'", '"foo"', "'☃'", "'foo\\'bar'",
+            '"foo\\"bar"', "'\\\\'", "'\\a\\b\\f\\n\\r\\t\\v'", "'\\0'",
+            "'\\12'", "'\\123'", "'\\777'", "'\\1234'", "'\\8'", "'\\q'",
+            "'\\x41'", "'\\x4'", "'\\u2603'", "'\\u260'", "'\\U0001F600'",
+            "'\\U00110000'", "'\\N{SNOWMAN}'", "'\\\"'", '"\\\'"', "'a\rb'",
+            "'a\x00b'", "'a\\\rb'", "'a\x0cb'", "'a'b'", "'a\\\\'b'",
+            "'abc\\'", "'", 'foo', "'foo\"", "'\\x41\\u00e9\\n'",
+            "'\\☃'", "'é\\n'", "'a\\\nb'",
+        )
+    ),
+)
+def test_parse_same_as_literal_eval(tp, s):
+    assert _result(tp.parse, s) == _result(LITERAL_EVAL_PARSE[tp], s)
@@ -3,17 +3,49 @@ from __future__ import unicode_literals
 
 import collections
 import io
+import os
 
 import pytest
 
+from dumbconf import _diskcache
+from dumbconf import _parse
+from dumbconf import _roundtrip
+from dumbconf._error import ParseError
+from dumbconf._lazy import freeze
+from dumbconf._lazy import LazyList
+from dumbconf._lazy import LazyMap
+from dumbconf._parse import Spans
+from dumbconf._parse import unparse
+from dumbconf._roundtrip import _load_packed
+from dumbconf._roundtrip import AstProxy
 from dumbconf._roundtrip import dump
 from dumbconf._roundtrip import dump_roundtrip
 from dumbconf._roundtrip import dumps
 from dumbconf._roundtrip import dumps_roundtrip
+from dumbconf._roundtrip import Encoder
+from dumbconf._roundtrip import iter_dumps
 from dumbconf._roundtrip import load
+from dumbconf._roundtrip import load_many
+from dumbconf._roundtrip import load_path
 from dumbconf._roundtrip import load_roundtrip
 from dumbconf._roundtrip import loads
+from dumbconf._roundtrip import loads_bytes
 from dumbconf._roundtrip import loads_roundtrip
+from dumbconf._roundtrip import Writer
+from dumbconf._tokenize import tokenize_packed
+
+
+def test_loads_deeply_nested():
+    depth = 10000
+    val = loads('{k: [' * depth + 'null' + ']}' * depth)
+    for _ in range(depth):
+        val = val['k'][0]
+    assert val is None
+
+
+def test_dumps_roundtrip_deeply_nested():
+    src = '[\n' * 10000 + 'true' + ',\n]' * 10000
+    assert dumps_roundtrip(loads_roundtrip(src)) == src
 
 
 def test_replace_value_same_type():
@@ -294,6 +326,102 @@ def test_loads_map():
     assert ret == {'a': 'a_value', 'b': 'b_value', 'c': 'c_value'}
 
 
+LOADS_SRCS = (
+    '[]', '{}', '[\n]', '{\n    # comment\n}',
+    '# head\n\n{a: [1, 2.5, "s"], b: {c: null}}  # tail\n',
+    '[\n    1, 2,\n    # comment\n    [3, {\n        d: 4,\n    }],\n]',
+    'a: 1\nb: [true]  # comment\n\n# comment\nc: {}\n',
+    '{a: 1, a: 2, b: 3}', 'a: 1\nb: 2\na: 3\n',
+    '{true: 1, null: 2, 3: 4, "k": 5}',
+    # invalid
+    '', '[', '[1,2]', '[1 ,2]', '{a:1}', '{a: 1,}', '[\n    1\n]',
+    '[\n    1, 2\n]', 'a: 1\nb 2', 'a: 1 b: 2', '[1] 2', '{[]: 1}',
+    '{a: }', '[1, 2', '[]]',
+)
+
+
+def _loads_roundtrip_value(src):
+    try:
+        return loads_roundtrip(src).python_value()
+    except ParseError as e:
+        return str(e)
+
+
+def _loads_value(src):
+    try:
+        return loads(src)
+    except ParseError as e:
+        return str(e)
+
+
+@pytest.mark.parametrize('src', LOADS_SRCS)
+def test_loads_same_as_roundtrip(src):
+    ret = _loads_value(src)
+    assert ret == _loads_roundtrip_value(src)
+    assert type(ret) is type(_loads_roundtrip_value(src))
+
+
+def _plain(val):
+    if isinstance(val, (dict, LazyMap)):
+        return collections.OrderedDict((k, _plain(v)) for k, v in val.items())
+    elif isinstance(val, (list, LazyList)):
+        return [_plain(v) for v in val]
+    else:
+        return val
+
+
+def _loads_lazy_value(src):
+    try:
+        return _plain(loads(src, lazy=True))
+    except ParseError:
+        return 'error'
+
+
+@pytest.mark.parametrize('src', LOADS_SRCS)
+def test_loads_lazy(src):
+    expected = _loads_value(src)
+    if not isinstance(expected, (dict, list)):
+        expected = 'error'
+    assert _loads_lazy_value(src) == expected
+
+
+def test_loads_lazy_parses_on_access():
+    ret = loads('a: [1, [2]]\nb: {c: 3}\n', lazy=True)
+    assert isinstance(ret, collections.OrderedDict)
+    assert not ret['a'].is_parsed
+    assert ret['a'][0] == 1
+    assert not ret['a'][1].is_parsed
+    assert not ret['b'].is_parsed
+
+
+def test_loads_lazy_error_on_access():
+    ret = loads('{a: {b: 1}, c: [1, 2,3]}', lazy=True)
+    assert ret['a'] == {'b': 1}
+    with pytest.raises(ParseError) as excinfo:
+        ret['c'][0]
+    assert (excinfo.value.line, excinfo.value.col) == (1, 22)
+
+
+def test_loads_roundtrip_lazy_edit():
+    src = 'a: [1, {b: [2, 3]}]  # comment\nc: {\n    d: 4,\n}\n'
+    lazy = loads_roundtrip(src, lazy=True)
+    eager = loads_roundtrip(src)
+    for val in (lazy, eager):
+        val['a'][1]['b'][0] = 5
+    assert dumps_roundtrip(lazy) == dumps_roundtrip(eager)
+    assert lazy['c']['d'].python_value() == 4
+    assert lazy.python_value() == eager.python_value()
+
+
+def test_roundtrip_python_value_deeply_nested():
+    depth = 10000
+    val = loads_roundtrip('{k: [' * depth + 'null' + ']}' * depth)
+    val = val.python_value()
+    for _ in range(depth):
+        val = val['k'][0]
+    assert val is None
+
+
 @pytest.mark.parametrize(
     ('v', 'expected'),
     (
@@ -312,6 +440,98 @@ def test_dumps_simple(v, expected):
     assert dumps(v) == expected
 
 
+SOURCE_SRC = 'a: {\n    b: [1, 2],  # c\n}\nc: true\n'
+
+
+def test_source():
+    proxy = loads_roundtrip(SOURCE_SRC)
+    assert proxy.source() == SOURCE_SRC
+    assert proxy.span() == (0, len(SOURCE_SRC))
+    assert proxy['a'].source() == '{\n    b: [1, 2],  # c\n}'
+    assert proxy['a']['b'].source() == '[1, 2]'
+    assert proxy['a']['b'][1].source() == '2'
+    assert proxy['c'].span() == (SOURCE_SRC.index('true'), len(SOURCE_SRC) - 1)
+
+
+def test_source_from_tokens_walks_nothing():
+    proxy = loads_roundtrip(SOURCE_SRC)
+    assert proxy['a']['b'][1].source() == '2'
+    assert proxy._spans is None
+
+
+SPAN_SRC = (
+    '# head\n\n'
+    'a: [1, {b: [2]}]  # c\n'
+    'd: {\n    e: [3, 4],\n    f: {g: 5},\n}\n'
+    'h: [[6], 7]\n'
+    '# tail\n'
+)
+
+
+@pytest.mark.parametrize('lazy', (False, True))
+@pytest.mark.parametrize(
+    'chain',
+    (
+        (), ('a',), ('a', 1), ('a', 1, 'b', 0), ('d',), ('d', 'f', 'g'),
+        ('h', 0), ('h', 0, 0), ('h', 1),
+    ),
+)
+def test_span_matches_spans(lazy, chain):
+    proxy = loads_roundtrip(SPAN_SRC, lazy=lazy)
+    target = proxy
+    for key in chain:
+        target = target[key]
+    span = target.span()
+    spans = Spans(proxy._ast_obj)
+    assert span == spans[_roundtrip._get(proxy._ast_obj, chain).val]
+
+
+def test_span_skips_lazy_lists_maps():
+    proxy = loads_roundtrip(SPAN_SRC, lazy=True)
+    assert proxy['h'][1].source() == '7'
+    a, d, _ = proxy._ast_obj.val.items
+    assert not a.val.is_parsed
+    assert not d.val.is_parsed
+
+
+def test_source_after_edit():
+    proxy = loads_roundtrip(SOURCE_SRC)
+    proxy['a']['b'] = 'hello'
+    assert proxy['a']['b'].source() == "'hello'"
+    assert proxy['a'].source() == "{\n    b: 'hello',  # c\n}"
+    assert proxy._spans is None
+    true = SOURCE_SRC.index('true') + 1
+    assert proxy['c'].span() == (true, true + 4)
+    spans = proxy._spans
+    proxy['a']['b'].span()
+    assert proxy._spans is spans
+    assert proxy.source() == dumps_roundtrip(proxy)
+
+
+@pytest.mark.parametrize(
+    'load',
+    (
+        lambda src: loads_roundtrip(src, lazy=True),
+        lambda src: load_roundtrip(io.StringIO(src)),
+        lambda src: AstProxy(loads_roundtrip(src)._ast_obj),
+    ),
+)
+def test_source_loaders(load):
+    proxy = load(SOURCE_SRC)
+    assert proxy['a']['b'].source() == '[1, 2]'
+    assert proxy.source() == SOURCE_SRC
+    assert proxy['c'].span() == (SOURCE_SRC.index('true'), len(SOURCE_SRC) - 1)
+
+
+def test_dumps_roundtrip_set_shares_trivia_tokens():
+    proxy = loads_roundtrip('a: 1\n')
+    proxy['a'] = [1, 2]
+    item, = proxy._ast_obj.val.items
+    comma, space = item.val.items[0].tail
+    assert comma is tokenize_packed(',')[0]
+    assert space is item.inner[1]
+
+
 def test_dumps_list():
     assert dumps([1, 2, 3], indented=False) == '[1, 2, 3]'
 
@@ -421,17 +641,446 @@ def test_non_bare_wordable_dump():
     assert ret == "{'true': {'un bearable': 'hi'}}"
 
 
+EMIT_VALUES = (
+    True, None, 5, 5.1, 'ohai', (), [], {},
+    [1, 2, 3], [[1, 2], [3, 4]], [[], [1], {}],
+    {1: 2, 3: 4}, {1: {2: 3}, 4: [5]}, {1: {2: 3}, 4: {5: 6}},
+    {'hello': {'there': 'world'}, 'true': {'un bearable': [[1, {2: 3}]]}},
+    {None: 1, 1.5: 2, True: 3},
+)
+
+
+@pytest.mark.parametrize('v', EMIT_VALUES)
+@pytest.mark.parametrize('indented', (True, False))
+@pytest.mark.parametrize('bare_keys', (True, False))
+@pytest.mark.parametrize('top_level_map', (True, False))
+@pytest.mark.parametrize('inline_small_containers', (True, False))
+def test_dumps_same_as_parsed_tokens(
+        v, indented, bare_keys, top_level_map, inline_small_containers,
+):
+    settings = _roundtrip.Settings(
+        indent=0 if indented else -1,
+        bare_keys=bare_keys,
+        inline_small_containers=inline_small_containers,
+    )
+    expected = unparse(
+        _roundtrip._to_ast(v, settings, top_level_map=top_level_map),
+    )
+    ret = dumps(
+        v,
+        indented=indented,
+        bare_keys=bare_keys,
+        top_level_map=top_level_map,
+        inline_small_containers=inline_small_containers,
+    )
+    assert ret == expected
+
+
+def test_dumps_container_key():
+    with pytest.raises(TypeError) as excinfo:
+        dumps({(1, 2): 3})
+    msg, = excinfo.value.args
+    assert msg == (
+        'Keys must be of type (BareWordKey, Bool, Float, Int, Null, String) '
+        'but got tuple'
+    )
+
+
+def test_dumps_deeply_nested():
+    depth = 10000
+    val = []
+    for _ in range(depth):
+        val = [val]
+    ret = dumps(val, indented=False)
+    assert ret == '[' * (depth + 1) + ']' * (depth + 1)
+
+
+def test_encoder_reused():
+    encoder = Encoder(indented=False)
+    assert encoder.encode({'a': [1]}) == '{a: [1]}'
+    assert encoder.encode({'a': [2]}) == '{a: [2]}'
+    assert ''.join(encoder.iter_encode({'a': [3]})) == '{a: [3]}'
+
+
+@pytest.mark.parametrize(
+    'v',
+    (
+        {'a': True},
+        {'a': {'b': [1, 2, 3]}},
+        collections.OrderedDict((('b', 1), ('a', 2))),
+        [{'a': 1}, {'a': 2, 'b': 3}],
+    ),
+)
+def test_encoder_same_as_dumps(v):
+    kwargs = {'bare_keys': False, 'inline_small_containers': False}
+    assert Encoder(**kwargs).encode(v) == dumps(v, **kwargs)
+
+
+class MyStr(type('')):
+    pass
+
+
+class MyInt(int):
+    pass
+
+
+def test_encoder_subclasses():
+    ret = Encoder(indented=False).encode({MyStr('a b'): [MyInt(1), MyStr()]})
+    assert ret == "{'a b': [1, '']}"
+
+
+class MyDict(dict):
+    pass
+
+
+class MyList(list):
+    pass
+
+
+def test_encoder_container_subclasses():
+    ret = Encoder(indented=False).encode(MyDict({'a': MyList((1, 2))}))
+    assert ret == '{a: [1, 2]}'
+
+
+def test_encoder_default():
+    encoder = Encoder(indented=False, default=sorted)
+    assert encoder.encode({'a': {3, 1, 2}}) == '{a: [1, 2, 3]}'
+
+
+def test_encoder_default_keys():
+    encoder = Encoder(indented=False, default=lambda v: '-'.join(v))
+    assert encoder.encode({frozenset(('a',)): 1}) == '{a: 1}'
+
+
+def test_encoder_default_keys_not_primitive():
+    encoder = Encoder(indented=False, default=list)
+    with pytest.raises(TypeError) as excinfo:
+        encoder.encode({frozenset(('a',)): 1})
+    msg, = excinfo.value.args
+    assert msg.endswith('but got list')
+
+
+def test_encoder_circular_list():
+    val = []
+    val.append([val])
+    with pytest.raises(ValueError) as excinfo:
+        dumps(val)
+    assert excinfo.value.args == ('Circular reference detected',)
+
+
+def test_encoder_circular_top_level_map():
+    val = {}
+    val['a'] = val
+    with pytest.raises(ValueError):
+        dumps(val)
+
+
+def test_encoder_circular_default():
+    with pytest.raises(ValueError):
+        Encoder(default=lambda v: v).encode({1})
+
+
+def test_encoder_repeated_value_not_circular():
+    val = [1]
+    assert dumps([val, val], indented=False) == '[[1], [1]]'
+
+
+def test_encoder_not_serializable():
+    with pytest.raises(TypeError) as excinfo:
+        dumps({'a': {1}})
+    msg, = excinfo.value.args
+    assert msg == 'Object of type set is not serializable'
+
+
+@pytest.mark.parametrize('val', (b'ab', bytearray(b'ab')))
+def test_encoder_bytes_not_serializable(val):
+    with pytest.raises(TypeError):
+        dumps([val])
+
+
+LAZY_SRC = 'a: [\n    1,\n    {b: true},\n]\nc: {}\n'
+
+
+def test_dumps_lazy_values():
+    val = loads(LAZY_SRC, lazy=True)
+    assert dumps(val) == LAZY_SRC
+    assert dumps(val, indented=False) == '{a: [1, {b: true}], c: {}}'
+
+
+def test_dumps_frozen_values():
+    assert dumps(freeze(loads(LAZY_SRC))) == LAZY_SRC
+
+
+def test_dumps_roundtrip_set_lazy_value():
+    proxy = loads_roundtrip('a: 1\n')
+    proxy['a'] = loads('b: [1, 2]\n', lazy=True)['b']
+    assert dumps_roundtrip(proxy) == 'a: [1, 2]\n'
+
+
+def test_encoder_key_cache_bounded():
+    encoder = Encoder(indented=False, key_cache_size=2)
+    for k in ('a', 'b c', 'd', 'true'):
+        encoder.encode({k: 1})
+        assert len(encoder._keys) <= 2
+    ret = encoder.encode(collections.OrderedDict((('true', 1), ('e', 2))))
+    assert ret == "{'true': 1, e: 2}"
+
+
+def test_encoder_deeper_than_indent_table():
+    val = 1
+    for _ in range(40):
+        val = [val]
+    ret = Encoder(inline_small_containers=False).encode(val)
+    assert '\n' + '    ' * 40 + '1,\n' in ret
+    assert ret == unparse(
+        _roundtrip._to_ast(val, _roundtrip.Settings(0, True, False)),
+    )
+
+
+def test_dumps_reuses_encoders():
+    dumps({'a': 1}, indented=False)
+    encoder = _roundtrip._ENCODERS[(False, True, True, True)]
+    dumps({'b': 1}, indented=False)
+    assert _roundtrip._ENCODERS[(False, True, True, True)] is encoder
+    assert 'b' in encoder._keys
+
+
+def _write_value(writer, v):
+    # Write `v` with the writer's containers rather than `value`
+    if isinstance(v, dict):
+        writer.begin_map()
+        for k, item in v.items():
+            writer.key(k)
+            _write_value(writer, item)
+        writer.end()
+    elif isinstance(v, list):
+        writer.begin_list()
+        for item in v:
+            _write_value(writer, item)
+        writer.end()
+    else:
+        writer.value(v)
+
+
+@pytest.mark.parametrize(
+    'v',
+    (
+        5, 'hi', [], {}, [1, 2], [[1, 2], [3, [4]]], {'a': 1},
+        {'a': {'b': [1, 2]}, 'c d': [], 'e': {}, 'true': [{}, [[]]]},
+    ),
+)
+@pytest.mark.parametrize('indented', (True, False))
+@pytest.mark.parametrize('top_level_map', (True, False))
+def test_writer_same_as_dumps(v, indented, top_level_map):
+    settings = {
+        'indented': indented,
+        'top_level_map': top_level_map,
+        'inline_small_containers': False,
+    }
+    sio = io.StringIO()
+    _write_value(Writer(sio, **settings), v)
+    assert sio.getvalue() == dumps(v, **settings)
+
+
+def test_writer_values():
+    sio = io.StringIO()
+    writer = Writer(sio)
+    writer.begin_map()
+    writer.key('a')
+    writer.value(collections.OrderedDict((('b', [1, 2]), ('c', [3]))))
+    writer.key('d')
+    writer.begin_list()
+    writer.value({'e': 1})
+    writer.end()
+    writer.end()
+    assert sio.getvalue() == (
+        'a: {\n'
+        '    b: [\n'
+        '        1,\n'
+        '        2,\n'
+        '    ],\n'
+        '    c: [3],\n'
+        '}\n'
+        'd: [\n'
+        '    {e: 1},\n'
+        ']\n'
+    )
+
+
+def test_writer_comments():
+    sio = io.StringIO()
+    writer = Writer(sio)
+    writer.comment('head')
+    writer.begin_map()
+    writer.key('a')
+    writer.begin_list()
+    writer.comment('first')
+    writer.value(1)
+    writer.end()
+    writer.comment('between')
+    writer.key('b')
+    writer.begin_map()
+    writer.comment('only')
+    writer.end()
+    writer.comment('last')
+    writer.end()
+    ret = sio.getvalue()
+    assert ret == (
+        '# head\n'
+        'a: [\n'
+        '    # first\n'
+        '    1,\n'
+        ']\n'
+        '# between\n'
+        'b: {\n'
+        '    # only\n'
+        '}\n'
+        '# last\n'
+    )
+    assert loads(ret) == {'a': [1], 'b': {}}
+
+
+def test_writer_writes_in_chunks(monkeypatch):
+    monkeypatch.setattr(_parse, '_WRITE_CHUNK', 10)
+    writes = []
+    writer = Writer(collections.namedtuple('W', 'write')(writes.append))
+    writer.begin_list()
+    for i in range(20):
+        writer.value(i)
+    assert len(writes) > 5
+    assert all(len(chunk) < 20 for chunk in writes)
+    writer.end()
+    assert ''.join(writes) == dumps(list(range(20)))
+
+
+def test_writer_flush():
+    sio = io.StringIO()
+    writer = Writer(sio)
+    writer.begin_list()
+    writer.value(1)
+    assert sio.getvalue() == ''
+    writer.flush()
+    assert sio.getvalue() == '[\n    1,\n'
+
+
+@pytest.mark.parametrize(
+    ('calls', 'msg'),
+    (
+        ((('end', ()),), 'There is no map / list to end.'),
+        ((('key', ('a',)),), 'Keys can only be written in a map.'),
+        (
+            (('begin_list', ()), ('key', ('a',))),
+            'Keys can only be written in a map.',
+        ),
+        ((('begin_map', ()), ('value', (1,))), 'Expected a key.'),
+        (
+            (('begin_map', ()), ('key', ('a',)), ('key', ('b',))),
+            'Expected a value.',
+        ),
+        (
+            (('begin_map', ()), ('key', ('a',)), ('end', ())),
+            'Expected a value.',
+        ),
+        (
+            (('begin_map', ()), ('key', ('a',)), ('comment', ('c',))),
+            'Expected a value.',
+        ),
+        (
+            (('value', (1,)), ('value', (2,))),
+            'The document is already complete.',
+        ),
+        (
+            (('value', (1,)), ('comment', ('c',))),
+            'The document is already complete.',
+        ),
+    ),
+)
+def test_writer_errors(calls, msg):
+    writer = Writer(io.StringIO())
+    for name, args in calls[:-1]:
+        getattr(writer, name)(*args)
+    name, args = calls[-1]
+    with pytest.raises(TypeError) as excinfo:
+        getattr(writer, name)(*args)
+    assert excinfo.value.args == (msg,)
+
+
+def test_writer_comment_not_indented():
+    writer = Writer(io.StringIO(), indented=False)
+    with pytest.raises(TypeError):
+        writer.comment('c')
+
+
+def test_writer_comment_multiple_lines():
+    with pytest.raises(ValueError):
+        Writer(io.StringIO()).comment('a\nb')
+
+
 def test_load():
     sio = io.StringIO('{hello: "world"}')
     assert load(sio) == {'hello': 'world'}
 
 
+def test_load_keyword_prefixed_key_at_chunk_boundary():
+    # The first chunk ends right after `nullable_true`
+    padding = '# {}\n'.format('x' * (8192 - len('# \nnullable_true')))
+    src = padding + 'nullable_true_x: 1\n'
+    assert load(io.StringIO(src)) == loads(src) == {'nullable_true_x': 1}
+
+
 def test_dump():
     sio = io.StringIO()
     dump({'hello': 'world'}, sio, indented=False, bare_keys=False)
     assert sio.getvalue() == "{'hello': 'world'}"
 
 
+def test_iter_dumps():
+    v = {'a': [1, {'b': 2, 'c': [3]}], 'd': 'e'}
+    assert ''.join(iter_dumps(v)) == dumps(v)
+
+
+def test_iter_dumps_chunks(monkeypatch):
+    monkeypatch.setattr(_parse, '_WRITE_CHUNK', 10)
+    v = {'k{}'.format(i): [i, i] for i in range(10)}
+    chunks = list(iter_dumps(v))
+    assert ''.join(chunks) == dumps(v)
+    assert len(chunks) > 5
+    assert all(len(chunk) < 20 for chunk in chunks)
+
+
+@pytest.mark.parametrize(
+    ('n', 'expected'),
+    (
+        (0, '[]'),
+        (1, '[0]'),
+        (3, '[\n    0,\n    1,\n    2,\n]'),
+    ),
+)
+def test_dumps_iterator(n, expected):
+    assert dumps(iter(range(n))) == expected
+
+
+def test_dumps_generator_inline():
+    ret = dumps({'a': (i for i in range(3))}, indented=False)
+    assert ret == '{a: [0, 1, 2]}'
+
+
+def test_dump_writes_while_reading_generator(monkeypatch):
+    monkeypatch.setattr(_parse, '_WRITE_CHUNK', 10)
+    written = []
+    seen = []
+
+    def gen():
+        for i in range(100):
+            seen.append(len(written))
+            yield i
+
+    dump({'a': gen()}, collections.namedtuple('W', 'write')(written.append))
+    assert ''.join(written) == dumps({'a': list(range(100))})
+    # chunks were written before the generator was exhausted
+    assert seen[-1] > 50
+
+
 def test_load_dump_roundtrip():
     s = (
         '{\n'
@@ -451,3 +1100,162 @@ def test_dump_roundtrip():
     sio = io.StringIO()
     dump_roundtrip(loads_roundtrip(s), sio)
     assert sio.getvalue() == s
+
+
+def test_loads_bytes():
+    src = "# \u2603\nsnowman: ['\u2603', '\\u2603']\n"
+    assert loads_bytes(src.encode('UTF-8')) == loads(src)
+
+
+def test_loads_bytes_error_position_in_characters():
+    with pytest.raises(ParseError) as excinfo:
+        loads_bytes("['\u2603', &]".encode('UTF-8'))
+    assert excinfo.value.msg == 'Unexpected token'
+    assert (excinfo.value.line, excinfo.value.col) == (1, 7)
+
+
+def test_loads_bytes_parse_error_position_in_characters():
+    with pytest.raises(ParseError) as excinfo:
+        loads_bytes("['\u2603' true]".encode('UTF-8'))
+    assert excinfo.value.msg == 'Expected one of (Comma) but received Space'
+    assert (excinfo.value.line, excinfo.value.col) == (1, 5)
+
+
+@pytest.mark.parametrize(
+    ('src', 'offset'),
+    (
+        (b'x: 1  # \xff\n', 8),
+        (b"x: '\xe2\x98\x83\xe2\x98'\n", 7),
+        (b'x: 1\n# \xe2\x98\x83 \xc3\n', 11),
+    ),
+)
+def test_loads_bytes_invalid_utf8(src, offset):
+    with pytest.raises(UnicodeDecodeError):
+        src.decode('UTF-8')
+    with pytest.raises(ParseError) as excinfo:
+        loads_bytes(src)
+    assert excinfo.value.msg == 'Invalid UTF-8'
+    assert excinfo.value.offset == offset
+
+
+def test_load_path(tmpdir):
+    src = "k: ['\u2603', 1.5]\n"
+    path = tmpdir.join('f.dumb')
+    path.write_binary(src.encode('UTF-8'))
+    assert load_path(path.strpath) == {'k': ['\u2603', 1.5]}
+
+
+def test_load_path_cache_dir(tmpdir, monkeypatch):
+    cache_dir = tmpdir.join('cache').strpath
+    path = tmpdir.join('f.dumb')
+    path.write_binary(b'k: [1, 2]\n')
+    assert load_path(path.strpath, cache_dir=cache_dir) == {'k': [1, 2]}
+    assert len(os.listdir(cache_dir)) == 1
+
+    def loads_bytes(b):
+        raise AssertionError('unreachable')
+    with monkeypatch.context() as m:
+        m.setattr(_roundtrip, 'loads_bytes', loads_bytes)
+        ret = load_path(path.strpath, cache_dir=cache_dir)
+    assert ret == {'k': [1, 2]}
+    assert isinstance(ret, collections.OrderedDict)
+
+    # A changed file is loaded again
+    path.write_binary(b'k: [1, 3]\n')
+    assert load_path(path.strpath, cache_dir=cache_dir) == {'k': [1, 3]}
+    # As is every file, when the version changes
+    monkeypatch.setattr(_diskcache, '_version', ('new',))
+    with monkeypatch.context() as m:
+        m.setattr(_roundtrip, 'loads_bytes', lambda b: 'reloaded')
+        assert load_path(path.strpath, cache_dir=cache_dir) == 'reloaded'
+
+
+def test_load_path_cache_dir_error(tmpdir):
+    cache_dir = tmpdir.join('cache').strpath
+    path = tmpdir.join('f.dumb')
+    path.write_binary(b'k: ')
+    with pytest.raises(ParseError):
+        load_path(path.strpath, cache_dir=cache_dir)
+    assert not os.path.exists(cache_dir)
+
+
+def test_load_path_empty_file(tmpdir):
+    path = tmpdir.join('f.dumb')
+    path.write_binary(b'')
+    with pytest.raises(ParseError):
+        load_path(path.strpath)
+
+
+LOAD_MANY_SRCS = (
+    "k: ['\u2603', 1.5]\n", '[1, 2', 'a: {\n    b: true,\n}\n', '',
+    '# comment\n[\n    {x: null},\n]\n',
+)
+
+
+@pytest.fixture
+def load_many_paths(tmpdir):
+    paths = []
+    for i, src in enumerate(LOAD_MANY_SRCS):
+        path = tmpdir.join('{}.dumb'.format(i))
+        path.write_binary(src.encode('UTF-8'))
+        paths.append(path.strpath)
+    return paths
+
+
+def _load_many_expected(src, mode):
+    try:
+        if mode == 'value':
+            return loads(src)
+        else:
+            return loads_roundtrip(src)
+    except ParseError as e:
+        return e
+
+
+def _load_many_compare(ret):
+    if isinstance(ret, ParseError):
+        return str(ret)
+    elif isinstance(ret, AstProxy):
+        return ret._ast_obj
+    else:
+        return ret
+
+
+@pytest.mark.parametrize('mode', ('value', 'roundtrip'))
+@pytest.mark.parametrize('workers', (1, 2))
+def test_load_many(load_many_paths, workers, mode):
+    ret = load_many(iter(load_many_paths), workers=workers, mode=mode)
+    expected = [_load_many_expected(src, mode) for src in LOAD_MANY_SRCS]
+    assert [type(v) for v in ret] == [type(v) for v in expected]
+    assert (
+        [_load_many_compare(v) for v in ret] ==
+        [_load_many_compare(v) for v in expected]
+    )
+
+
+def test_load_packed(load_many_paths):
+    value_path, error_path, roundtrip_path = load_many_paths[:3]
+    assert _load_packed((value_path, 'value')) == {'k': ['\u2603', 1.5]}
+    assert isinstance(_load_packed((error_path, 'roundtrip')), ParseError)
+    src, _, _, _ = _load_packed((roundtrip_path, 'roundtrip'))
+    assert src == LOAD_MANY_SRCS[2]
+
+
+def test_load_many_roundtrip_edit(load_many_paths):
+    proxy = load_many(load_many_paths, workers=2, mode='roundtrip')[2]
+    proxy['a']['b'] = False
+    assert dumps_roundtrip(proxy) == 'a: {\n    b: false,\n}\n'
+
+
+def test_load_many_default_workers(load_many_paths):
+    assert load_many(load_many_paths[:1]) == [{'k': ['\u2603', 1.5]}]
+
+
+def test_load_many_invalid_mode():
+    with pytest.raises(ValueError) as excinfo:
+        load_many([], mode='ast')
+    assert excinfo.value.args == (
+        'Expected mode to be one of (value, roundtrip) but got {!r}'.format(
+            'ast',
+        ),
+    )
@@ -1,11 +1,22 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+import io
+
 import pytest
 
 from dumbconf import ast
 from dumbconf._error import ParseError
+from dumbconf._tokenize import iter_tokens
+from dumbconf._tokenize import KIND
+from dumbconf._tokenize import MAKE_TOKEN
+from dumbconf._tokenize import pack_tokens
+from dumbconf._tokenize import retokenize
+from dumbconf._tokenize import token
 from dumbconf._tokenize import tokenize
+from dumbconf._tokenize import tokenize_packed
+from dumbconf._tokenize import tokenize_processors
+from dumbconf._tokenize import tokenize_stream
 
 
 def _assert_tokenize_error(src, s):
@@ -36,3 +47,247 @@ def test_bare_word_key_starts_with_other_token():
         ast.MapEnd('}'),
         ast.EOF(''),
     )
+
+
+def _tokenize_each_processor(src):
+    """The original tokenizer: try each processor's regex in order"""
+    offset = 0
+    tokens = []
+    while offset < len(src):
+        for reg, cls in tokenize_processors:
+            match = reg.match(src, offset)
+            if match:
+                tokens.append(MAKE_TOKEN[KIND[cls]](match.group()))
+                offset = match.end()
+                break
+        else:
+            raise ParseError(src, offset, 'Unexpected token')
+    tokens.append(ast.EOF(''))
+    return tuple(tokens)
+
+
+TOKENIZE_SRCS = (
+    "{true_values: [], null_key: null, falsey: false}\n",
+    '[0x1F, -0b101, 0o17, 0, -12, 1e5, 1.5E-3, .5, 0., -.25e+2]',
+    '["double \\"quoted\\"", \'single \\\'quoted\\\'\', \'\\u2603\']',
+    '# comment\n{\n    k: [\n        true,  # inline\n    ],\n}\n',
+    'key: value  \n    \n',
+    'truex: nullable\n',
+    '\n    \n        x',
+    '# no newline at end',
+    '[1.5e-3, 1e5, 0x1F, tru, true_, "long string"]\n        \n',
+)
+
+
+@pytest.mark.parametrize('src', ('',) + TOKENIZE_SRCS)
+def test_tokenize_same_as_each_processor(src):
+    assert tokenize(src) == _tokenize_each_processor(src)
+
+
+@pytest.mark.parametrize('src', ('&', '[true, &]', '{\n    k: @\n}', "'\n'"))
+def test_tokenize_error_same_offset_as_each_processor(src):
+    with pytest.raises(ParseError) as excinfo:
+        _tokenize_each_processor(src)
+    with pytest.raises(ParseError) as excinfo_master:
+        tokenize(src)
+    assert excinfo_master.value.offset == excinfo.value.offset
+
+
+def _chunked(src, size):
+    return [src[i:i + size] for i in range(0, len(src), size)]
+
+
+# Identifiers starting with `true` / `false` / `null`
+KEYWORD_PREFIXED_SRCS = (
+    'nullable_true_x: 1\n',
+    '{truenull: falsenull_x, nulltrue: null}',
+    '[null, true-false-null_0]',
+)
+
+
+def _tokens_or_error(func, src):
+    try:
+        return tuple(func(src))
+    except ParseError as e:
+        return e.offset, e.line, e.col
+
+
+@pytest.mark.parametrize(
+    'src',
+    TOKENIZE_SRCS + KEYWORD_PREFIXED_SRCS + (
+        # A bare word which ends a keyword begun by the number before it
+        '0x1ffalse 0x1f',
+        '[1,\n  &]',
+    ),
+)
+def test_iter_tokens_chunk_boundaries(src):
+    expected = _tokens_or_error(tokenize, src)
+    for size in range(1, len(src) + 1):
+        chunks = _chunked(src, size)
+        assert _tokens_or_error(iter_tokens, chunks) == expected
+
+
+def test_iter_tokens_stream():
+    src = ''.join(TOKENIZE_SRCS[:4])
+    stream = io.StringIO(src)
+    assert tuple(iter_tokens(stream, chunk_size=3)) == tokenize(src)
+
+
+def test_iter_tokens_empty():
+    assert tuple(iter_tokens(io.StringIO(''))) == (ast.EOF(''),)
+
+
+def test_iter_tokens_lazy():
+    def chunks():
+        yield '[true, false'
+        raise AssertionError('should not be read')
+
+    tokens = iter_tokens(chunks())
+    assert next(tokens) == ast.ListStart('[')
+    assert next(tokens) == ast.Bool(True, 'true')
+
+
+@pytest.mark.parametrize('size', (1, 3, 100))
+def test_iter_tokens_error(size):
+    src = 'a: [\n    b,\n    c, &, d,\n]\n'
+    with pytest.raises(ParseError) as excinfo:
+        tuple(iter_tokens(_chunked(src, size)))
+    msg = str(excinfo.value)
+    assert msg.startswith('Unexpected token\n\nLine 3, column 8\n\n')
+    assert '3   |' in msg
+    assert excinfo.value.offset == src.index('&')
+
+
+def test_iter_tokens_error_mid_line():
+    # The start of the line has already been discarded
+    src = '[' + 'true, ' * 5 + '&]'
+    with pytest.raises(ParseError) as excinfo:
+        tuple(iter_tokens(_chunked(src, 4)))
+    assert str(excinfo.value).startswith(
+        'Unexpected token\n\nLine 1, column 32\n\n',
+    )
+    assert excinfo.value.offset == 31
+
+
+def test_tokenize_packed():
+    tokens = tokenize_packed('[true, 5]')
+    assert tuple(ast.TOKENS[kind] for kind in tokens.kinds) == (
+        ast.ListStart, ast.Bool, ast.Comma, ast.Space, ast.Int, ast.ListEnd,
+        ast.EOF,
+    )
+    assert tuple(tokens.starts) == (0, 1, 5, 6, 7, 8, 9)
+    assert tuple(tokens.ends) == (1, 5, 6, 7, 8, 9, 9)
+    assert len(tokens) == 7
+    assert tokens[1] == ast.Bool(True, 'true')
+    assert tokens[-1] == ast.EOF('')
+    assert tokens[1:3] == (ast.Bool(True, 'true'), ast.Comma(','))
+    assert tuple(tokens) == tokenize('[true, 5]')
+
+
+def test_token_stream_error():
+    tokens = tokenize_packed('[\n    true,\n    5,\n]')
+    error = tokens.error(7, 'Error!')
+    assert (error.line, error.col, error.msg) == (3, 5, 'Error!')
+    # The line index is only built once
+    assert tokens.line_starts() is tokens.line_starts()
+    assert tuple(tokens.line_starts()) == (0, 2, 12, 19)
+
+
+@pytest.mark.parametrize('src', TOKENIZE_SRCS)
+def test_pack_tokens(src):
+    packed = pack_tokens(tokenize(src))
+    expected = tokenize_packed(src)
+    assert packed.src == expected.src
+    assert packed.kinds == expected.kinds
+    assert packed.starts == expected.starts
+    assert packed.ends == expected.ends
+
+
+def test_pack_tokens_many_tokens():
+    tokens = (ast.Comma(','), ast.Space(' ')) * 5000 + (ast.EOF(''),)
+    packed = pack_tokens(tokens)
+    assert packed.src == ', ' * 5000
+    assert tuple(packed) == tokens
+
+
+def test_tokenize_stream():
+    src = ''.join(TOKENIZE_SRCS[:4])
+    packed = tokenize_stream(io.StringIO(src), chunk_size=3)
+    assert packed.src == src
+    assert tuple(packed) == tokenize(src)
+    assert packed.kinds[-1] == KIND[ast.EOF]
+
+
+def _assert_same_stream(tokens, expected):
+    assert tokens.src == expected.src
+    assert tokens.kinds == expected.kinds
+    assert tokens.starts == expected.starts
+    assert tokens.ends == expected.ends
+
+
+EDIT_INSERTS = (
+    '', 'x', 'f', 's', 'null', ' ', '\n', '1', 'e5', '.', '    ', "'",
+    '# c\n',
+)
+
+
+@pytest.mark.parametrize(
+    'src',
+    TOKENIZE_SRCS + KEYWORD_PREFIXED_SRCS + ('a: nulltrue', '0x1aalse'),
+)
+def test_retokenize_same_as_tokenize(src):
+    tokens = tokenize_packed(src)
+    for offset in range(len(src) + 1):
+        for deleted in range(min(3, len(src) - offset) + 1):
+            for inserted in EDIT_INSERTS:
+                new_src = src[:offset] + inserted + src[offset + deleted:]
+                try:
+                    expected = tokenize_packed(new_src)
+                except ParseError as e:
+                    with pytest.raises(ParseError) as excinfo:
+                        retokenize(tokens, offset, deleted, inserted)
+                    assert excinfo.value.offset == e.offset
+                else:
+                    ret = retokenize(tokens, offset, deleted, inserted)
+                    _assert_same_stream(ret, expected)
+
+
+@pytest.mark.parametrize(
+    ('src', 'offset', 'inserted', 'expected'),
+    (
+        ('truenull: 1\n', 8, 'x', ast.BareWordKey('truenullx', 'truenullx')),
+        ('a: nulltrue', 11, 's', ast.BareWordKey('nulltrues', 'nulltrues')),
+    ),
+)
+def test_retokenize_keyword_becomes_bare_word(src, offset, inserted, expected):
+    ret = retokenize(tokenize_packed(src), offset, 0, inserted)
+    assert expected in tuple(ret)
+
+
+def test_retokenize_large_document():
+    src = '[{}]'.format(', '.join(['true'] * 1000))
+    tokens = tokenize_packed(src)
+    ret = retokenize(tokens, 1, 4, 'false')
+    _assert_same_stream(ret, tokenize_packed(src.replace('true', 'false', 1)))
+    assert ret[1] == ast.Bool(False, 'false')
+
+
+def test_trivia_tokens_are_shared():
+    tokens = tokenize_packed('a: [\n    1, 2,\n]\nb: {c: 3}\n')
+    first, second = tokens[:], tokens[:]
+    for token1, token2 in zip(first, second):
+        if type(token1) in (ast.Int, ast.BareWordKey):
+            assert token1 is not token2
+        else:
+            assert token1 is token2
+    assert tokens[:] == tokenize('a: [\n    1, 2,\n]\nb: {c: 3}\n')
+
+
+def test_token():
+    assert token(ast.Comma, ',') is token(ast.Comma, ',')
+    assert token(ast.Indent, '    ') is token(ast.Indent, '    ')
+    assert token(ast.Comment, '# c\n') == ast.Comment('# c\n')
+    # Only indents up to a (reasonable) depth are shared
+    deep = '    ' * 100
+    assert token(ast.Indent, deep) == ast.Indent(deep)
+    assert token(ast.Indent, deep) is not token(ast.Indent, deep)
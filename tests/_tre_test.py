@@ -4,7 +4,11 @@ from __future__ import unicode_literals
 import pytest
 
 from dumbconf import ast
+from dumbconf._error import ParseError
+from dumbconf._tokenize import KIND
+from dumbconf._tokenize import pack_tokens
 from dumbconf._tre import _pattern_expected_tokens
+from dumbconf._tre import compile_pattern
 from dumbconf._tre import Or
 from dumbconf._tre import Pattern
 from dumbconf._tre import Star
@@ -36,3 +40,113 @@ from dumbconf._tre import Star
 )
 def test_pattern_expected_tokens(pattern, expected):
     assert _pattern_expected_tokens(pattern) == expected
+
+
+def _tokens(*types):
+    return pack_tokens(tuple(tp('') for tp in types) + (ast.EOF(''),))
+
+
+@pytest.mark.parametrize(
+    ('pattern', 'types', 'end'),
+    (
+        (ast.Comment, (ast.Comment,), 1),
+        (Or(ast.Comment, ast.NL), (ast.NL,), 1),
+        (Pattern(ast.Space, ast.Comment), (ast.Space, ast.Comment), 2),
+        (Pattern(Star(ast.Space), ast.Comment), (ast.Comment,), 1),
+        (
+            Pattern(Star(ast.Space), ast.Comment),
+            (ast.Space, ast.Space, ast.Comment, ast.NL),
+            3,
+        ),
+        (Star(Or(ast.Indent, ast.NL, ast.Comment)), (), 0),
+        (
+            Star(Or(ast.Indent, ast.NL, ast.Comment)),
+            (ast.Indent, ast.NL, ast.Comment, ast.Space),
+            3,
+        ),
+        (
+            Or(ast.NL, Pattern(Star(ast.Space), ast.Comment)),
+            (ast.Space, ast.Comment),
+            2,
+        ),
+        (Or(Star(ast.Space), ast.Comment), (ast.Comment,), 0),
+        (Pattern(Star(ast.Space), Star(ast.Comment)), (ast.Space, ast.NL), 1),
+        (
+            Pattern(
+                ast.Comma, Or(ast.NL, Pattern(Star(ast.Space), ast.Comment)),
+            ),
+            (ast.Comma, ast.Space, ast.Comment),
+            3,
+        ),
+    ),
+)
+def test_compile_pattern_match(pattern, types, end):
+    tokens = _tokens(*types)
+    matcher = compile_pattern(pattern)
+    assert matcher.match(tokens.kinds, 0) == end
+    assert matcher.get(tokens, 0) == (tokens[:end], end)
+
+
+@pytest.mark.parametrize(
+    ('pattern', 'types', 'msg'),
+    (
+        (ast.Comment, (), 'Expected one of (Comment) but received EOF'),
+        (
+            Or(ast.Comment, ast.NL), (ast.Space, ast.Comment),
+            'Expected one of (Comment, NL) but received Space',
+        ),
+        # The part of a sequence which failed is reported
+        (
+            Pattern(ast.Space, ast.Comment), (ast.Comment,),
+            'Expected one of (Space) but received Comment',
+        ),
+        (
+            Pattern(ast.Space, ast.Comment), (ast.Space, ast.NL),
+            'Expected one of (Comment) but received NL',
+        ),
+        (
+            Pattern(Pattern(ast.Space, Star(ast.Space)), ast.Comment),
+            (ast.Space, ast.NL),
+            'Expected one of (Comment) but received NL',
+        ),
+        (
+            Or(ast.NL, Pattern(Star(ast.Space), ast.Comment)), (ast.Space,),
+            'Expected one of (Comment, NL, Space) but received Space',
+        ),
+        (
+            Pattern(
+                ast.Comma, Or(ast.NL, Pattern(Star(ast.Space), ast.Comment)),
+            ),
+            (ast.Comma, ast.Space, ast.NL),
+            'Expected one of (Comment, NL, Space) but received Space',
+        ),
+    ),
+)
+def test_compile_pattern_no_match(pattern, types, msg):
+    tokens = _tokens(*types)
+    matcher = compile_pattern(pattern)
+    assert matcher.match(tokens.kinds, 0) == -1
+    with pytest.raises(ParseError) as excinfo:
+        matcher.get(tokens, 0)
+    assert excinfo.value.msg == msg
+
+
+def test_compile_pattern_first():
+    matcher = compile_pattern(Pattern(Star(ast.Space), ast.Comment))
+    assert matcher.first == frozenset((KIND[ast.Space], KIND[ast.Comment]))
+    assert not matcher.nullable
+    assert compile_pattern(Star(ast.Space)).nullable
+
+
+def test_compile_pattern_nested_matcher():
+    inner = compile_pattern(Or(ast.Comment, ast.NL))
+    matcher = compile_pattern(Pattern(ast.Space, inner))
+    assert matcher.pattern == Pattern(ast.Space, Or(ast.Comment, ast.NL))
+    assert matcher.expected == 'Space'
+    assert compile_pattern(matcher) is matcher
+
+
+def test_compile_pattern_get_single():
+    tokens = _tokens(ast.Comment, ast.NL)
+    matcher = compile_pattern(ast.Comment)
+    assert matcher.get(tokens, 0, single=True) == (ast.Comment(''), 1)
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import pickle
+
+import pytest
+
+from dumbconf import ast
+from dumbconf._parse import parse
+
+
+def _is_decoded(token):
+    return tuple.__getitem__(token, 0) is not ast._UNDECODED
+
+
+def test_from_src_decodes_on_access():
+    token = ast.String.from_src("'\\u2603'")
+    assert not _is_decoded(token)
+    assert token.val == '☃'
+    # Decoded again each time rather than kept per instance
+    assert not _is_decoded(token)
+    # No per instance storage to cache it in
+    with pytest.raises(AttributeError):
+        token.cached = True
+
+
+def test_from_src_behaves_like_decoded():
+    token = ast.Int.from_src('0x10')
+    decoded = ast.Int(16, '0x10')
+    assert token == decoded
+    assert not token != decoded
+    assert token != ast.Int(15, '0xf')
+    assert hash(token) == hash(decoded)
+    assert repr(token) == repr(decoded)
+    assert tuple(token) == (16, '0x10')
+    assert token[0] == 16
+    assert token._replace(src='16') == ast.Int(16, '16')
+    assert pickle.loads(pickle.dumps(token)) == decoded
+    assert 16 in token
+
+
+def test_from_src_orders_like_decoded():
+    token = ast.Int.from_src('1')
+    assert token < (2, '2')
+    assert token <= ast.Int(1, '1')
+    assert (0, '0') < token
+    assert token >= ast.Int(1, '1')
+    assert not token > ast.Int(1, '1')
+    assert sorted((ast.Int(2, '2'), token)) == [(1, '1'), (2, '2')]
+
+
+def test_from_src_decode_error_on_access():
+    token = ast.String.from_src("'\\x'")
+    with pytest.raises(SyntaxError):
+        token.val
+
+
+def test_parse_does_not_decode():
+    doc = parse("{a: 'b', c: [1, 2.5]}")
+    item = doc.val.items[1]
+    assert not _is_decoded(item.key)
+    assert item.val.items[1].val.val == 2.5
+    assert not _is_decoded(item.val.items[0].val)
+
+
+def test_lazy_node_parses_on_access():
+    calls = []
+
+    def parse():
+        calls.append(1)
+        return ast.List((), (), ())
+    node = ast.LazyList.lazy(parse, lambda: '[]')
+    assert not node.is_parsed
+    assert node.source() == '[]'
+    assert node.items == ()
+    assert node.is_parsed
+    assert node.head == node.tail == ()
+    assert calls == [1]
+
+
+def test_lazy_node_behaves_like_parsed():
+    parsed = ast.Map((), (), (ast.MapEnd('}'),))
+    node = ast.LazyMap.lazy(lambda: parsed, lambda: '}')
+    assert node == parsed
+    assert not node != parsed
+    assert hash(node) == hash(parsed)
+    assert repr(node) == repr(parsed)
+    assert tuple(node) == tuple(parsed)
+    assert node[2] == parsed.tail
+    assert type(node).__name__ == 'Map'
+    assert isinstance(node, ast.Map)
+    assert type(pickle.loads(pickle.dumps(node))) is ast.Map
+    replaced = node._replace(head=(ast.NL('\n'),))
+    assert replaced.is_parsed
+    assert replaced == ast.Map((ast.NL('\n'),), (), (ast.MapEnd('}'),))